@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import copy
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from .vectorstore import get_artifact, localize_chunk, set_artifact
+
+# Paraphrases embed almost identically even when they ask about a different
+# over, score or player, so cached answers are only reused for the same
+# numbers and the same names.
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_WORD = re.compile(r"[A-Za-z][A-Za-z'.-]*")
+# "did <name> hit/score/make", which also catches names typed in lower case.
+_SUBJECT = re.compile(r"\bdid\s+(?P<name>.+?)\s+(?:hit|score|make)\b", re.IGNORECASE)
+# Words that open a question capitalised without naming anything.
+_NOT_NAMES = frozenset(
+    "a an and are can could describe did do does explain for give how i in is list of on please show "
+    "summarise summarize tell the was were what when where which who whom whose why".split()
+)
+
+
+@dataclass(frozen=True)
+class _Signature:
+    numbers: frozenset[str]
+    # Capitalised words and the subject of "did X score", case-folded.
+    names: frozenset[str]
+    words: frozenset[str]
+
+    def matches(self, other: _Signature) -> bool:
+        """Same numbers, and every name either question mentions appears in both, in any case."""
+        return self.numbers == other.numbers and (self.names | other.names) <= (self.words & other.words)
+
+
+def _signature(question: str) -> _Signature:
+    words = _WORD.findall(question)
+    names = {word.casefold() for word in words if word[0].isupper()}
+    match = _SUBJECT.search(question)
+    if match:
+        names.update(word.casefold() for word in _WORD.findall(match.group("name")))
+    return _Signature(
+        numbers=frozenset(_NUMBER.findall(question)),
+        names=frozenset(names - _NOT_NAMES),
+        words=frozenset(word.casefold() for word in words),
+    )
+
+
+@dataclass
+class _SessionAnswers:
+    version: str
+    vectors: list[np.ndarray] = field(default_factory=list)
+    signatures: list[_Signature] = field(default_factory=list)
+    results: list[dict[str, Any]] = field(default_factory=list)
+
+
+class SemanticAnswerCache:
+    """Per-session answers, reused for questions whose embeddings are close.
+
+    Each session's entries are tagged with the version of the index they were
+    answered from; a lookup with a different version drops them. Both the
+    number of sessions and the entries per session are bounded, least
+    recently used first.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, max_sessions: int) -> None:
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, _SessionAnswers] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_sessions > 0
+
+    def get(self, session_id: str, version: str, question: str, embedding: list[float]) -> dict[str, Any] | None:
+        if not self.enabled:
+            return None
+        query = _unit(embedding)
+        signature = _signature(question)
+        with self._lock:
+            answers = self._current(session_id, version)
+            best = -1
+            if answers is not None and answers.vectors:
+                similarities = np.stack(answers.vectors) @ query
+                for i in np.argsort(-similarities):
+                    if similarities[i] < self.threshold:
+                        break
+                    if answers.signatures[i].matches(signature):
+                        best = int(i)
+                        break
+            if best < 0:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._sessions.move_to_end(session_id)
+            return copy.deepcopy(answers.results[best])
+
+    def put(
+        self, session_id: str, version: str, question: str, embedding: list[float], result: dict[str, Any]
+    ) -> None:
+        if not self.enabled:
+            return
+        vector = _unit(embedding)
+        with self._lock:
+            answers = self._current(session_id, version)
+            if answers is None:
+                answers = _SessionAnswers(version)
+                self._sessions[session_id] = answers
+            self._sessions.move_to_end(session_id)
+            answers.vectors.append(vector)
+            answers.signatures.append(_signature(question))
+            answers.results.append(copy.deepcopy(result))
+            if len(answers.results) > self.max_entries:
+                del answers.vectors[0], answers.signatures[0], answers.results[0]
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def stats(self) -> dict[str, float | int]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "sessions": len(self._sessions),
+                "threshold": self.threshold,
+            }
+
+    def _current(self, session_id: str, version: str) -> _SessionAnswers | None:
+        answers = self._sessions.get(session_id)
+        if answers is not None and answers.version != version:
+            del self._sessions[session_id]
+            self._invalidations += 1
+            return None
+        return answers
+
+
+class SummaryCache:
+    """Finished summaries, stored on the session's index.
+
+    Indexes are shared by every session with the same content, so a summary
+    generated for one upload is reused by identical re-uploads and is freed
+    with the index. ``version`` names everything else that shapes a summary
+    (model, prompt version, summary settings); entries for another version
+    are ignored.
+    """
+
+    def __init__(self, version: str) -> None:
+        self.version = version
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._precomputed = 0
+        self._precompute_failures = 0
+        self._precompute_joined = 0
+
+    def contains(self, session_id: str) -> bool:
+        return get_artifact(session_id, f"summary:{self.version}") is not None
+
+    def get(self, session_id: str) -> dict[str, Any] | None:
+        cached = get_artifact(session_id, f"summary:{self.version}")
+        with self._lock:
+            if cached is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        result = copy.deepcopy(cached)
+        result["citations"] = [localize_chunk(session_id, citation) for citation in result["citations"]]
+        return result
+
+    def put(self, session_id: str, result: dict[str, Any]) -> None:
+        set_artifact(session_id, f"summary:{self.version}", copy.deepcopy(result))
+
+    def record_precompute(self, ok: bool, joined: bool = False) -> None:
+        """Count a precompute: one that ``joined`` another caller's summary stored nothing itself."""
+        with self._lock:
+            if joined:
+                self._precompute_joined += 1
+            elif ok:
+                self._precomputed += 1
+            else:
+                self._precompute_failures += 1
+
+    def stats(self) -> dict[str, float | int]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "precomputed": self._precomputed,
+                "precompute_failures": self._precompute_failures,
+                "precompute_joined": self._precompute_joined,
+            }
+
+
+def _unit(embedding: list[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from .config import settings
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OPENAI_KEEPALIVE_SECONDS,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS, connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS)
+
+
+# One connection pool for every synchronous caller (ingest workers, sync
+# handlers); per-call options such as retries go through ``with_options``.
+client = OpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    timeout=_timeout(),
+    http_client=DefaultHttpxClient(limits=_limits(), timeout=_timeout()),
+)
+
+# httpx async pools are bound to the event loop that first uses them, so
+# there is one async client per loop; in the server that is exactly one.
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI] = weakref.WeakKeyDictionary()
+_async_lock = threading.Lock()
+
+
+def async_client() -> AsyncOpenAI:
+    """The shared ``AsyncOpenAI`` client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _async_lock:
+        instance = _async_clients.get(loop)
+        if instance is None:
+            instance = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                timeout=_timeout(),
+                http_client=DefaultAsyncHttpxClient(limits=_limits(), timeout=_timeout()),
+            )
+            _async_clients[loop] = instance
+        return instance
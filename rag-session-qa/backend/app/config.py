@@ -19,15 +19,79 @@ def _get_env_int(key: str, default: int) -> int:
         return default
 
 
+def _get_env_float(key: str, default: float) -> float:
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def _get_env_bool(key: str, default: bool) -> bool:
+    value = os.getenv(key)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
 @dataclass
 class Settings:
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     OPENAI_EMBED_MODEL: str = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small")
+    OPENAI_MAX_CONNECTIONS: int = _get_env_int("OPENAI_MAX_CONNECTIONS", 256)
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = _get_env_int("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 64)
+    OPENAI_KEEPALIVE_SECONDS: float = _get_env_float("OPENAI_KEEPALIVE_SECONDS", 30.0)
+    OPENAI_TIMEOUT_SECONDS: float = _get_env_float("OPENAI_TIMEOUT_SECONDS", 60.0)
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = _get_env_float("OPENAI_CONNECT_TIMEOUT_SECONDS", 5.0)
     MAX_CHUNKS_FOR_SUMMARY: int = _get_env_int("MAX_CHUNKS_FOR_SUMMARY", 12)
+    SUMMARY_MAP_TOKENS: int = _get_env_int("SUMMARY_MAP_TOKENS", 3000)
+    SUMMARY_NOTE_MAX_TOKENS: int = _get_env_int("SUMMARY_NOTE_MAX_TOKENS", 400)
+    SUMMARY_MAX_CONCURRENCY: int = _get_env_int("SUMMARY_MAX_CONCURRENCY", 8)
+    SUMMARY_PRECOMPUTE: bool = _get_env_bool("SUMMARY_PRECOMPUTE", False)
     TOP_K: int = _get_env_int("TOP_K", 5)
+    ASK_BATCH_MAX_QUESTIONS: int = _get_env_int("ASK_BATCH_MAX_QUESTIONS", 64)
+    ASK_BATCH_MAX_CONCURRENCY: int = _get_env_int("ASK_BATCH_MAX_CONCURRENCY", 8)
     CHUNK_SIZE: int = _get_env_int("CHUNK_SIZE", 800)
     CHUNK_OVERLAP: int = _get_env_int("CHUNK_OVERLAP", 120)
+    CHUNK_MODE: str = os.getenv("CHUNK_MODE", "chars")
+    CHUNK_TOKENS: int = _get_env_int("CHUNK_TOKENS", 256)
+    CHUNK_OVERLAP_TOKENS: int = _get_env_int("CHUNK_OVERLAP_TOKENS", 32)
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "chroma")
+    CHROMA_PERSIST_PATH: str = os.getenv("CHROMA_PERSIST_PATH", ".cache/chroma")
+    HYBRID_SEARCH: bool = _get_env_bool("HYBRID_SEARCH", True)
+    HYBRID_DENSE_WEIGHT: float = _get_env_float("HYBRID_DENSE_WEIGHT", 1.0)
+    HYBRID_LEXICAL_WEIGHT: float = _get_env_float("HYBRID_LEXICAL_WEIGHT", 1.0)
+    HYBRID_RRF_K: int = _get_env_int("HYBRID_RRF_K", 60)
+    HYBRID_CANDIDATES: int = _get_env_int("HYBRID_CANDIDATES", 20)
+    CONTEXT_TOKEN_BUDGET: int = _get_env_int("CONTEXT_TOKEN_BUDGET", 4000)
+    MMR_LAMBDA: float = _get_env_float("MMR_LAMBDA", 0.7)
+    MMR_CANDIDATES: int = _get_env_int("MMR_CANDIDATES", 20)
+    MERGE_ADJACENT_CHUNKS: bool = _get_env_bool("MERGE_ADJACENT_CHUNKS", True)
+    SESSION_MAX_CHUNKS: int = _get_env_int("SESSION_MAX_CHUNKS", 50_000)
+    SESSION_MAX_BYTES: int = _get_env_int("SESSION_MAX_BYTES", 512 * 1024 * 1024)
+    SESSION_TTL_SECONDS: int = _get_env_int("SESSION_TTL_SECONDS", 3600)
+    SESSION_SWEEP_INTERVAL_SECONDS: int = _get_env_int("SESSION_SWEEP_INTERVAL_SECONDS", 60)
+    EMBED_CACHE_PATH: str = os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite3")
+    EMBED_CACHE_MAX_BYTES: int = _get_env_int("EMBED_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+    ANSWER_CACHE_THRESHOLD: float = _get_env_float("ANSWER_CACHE_THRESHOLD", 0.95)
+    ANSWER_CACHE_MAX_ENTRIES: int = _get_env_int("ANSWER_CACHE_MAX_ENTRIES", 128)
+    ANSWER_CACHE_MAX_SESSIONS: int = _get_env_int("ANSWER_CACHE_MAX_SESSIONS", 1024)
+    QUERY_EMBED_CACHE_SIZE: int = _get_env_int("QUERY_EMBED_CACHE_SIZE", 1024)
+    EMBED_BATCH_MAX_ITEMS: int = _get_env_int("EMBED_BATCH_MAX_ITEMS", 128)
+    EMBED_BATCH_MAX_TOKENS: int = _get_env_int("EMBED_BATCH_MAX_TOKENS", 50_000)
+    EMBED_MAX_IN_FLIGHT: int = _get_env_int("EMBED_MAX_IN_FLIGHT", 4)
+    EMBED_MAX_RETRIES: int = _get_env_int("EMBED_MAX_RETRIES", 5)
+    EMBED_RETRY_MAX_DELAY_SECONDS: int = _get_env_int("EMBED_RETRY_MAX_DELAY_SECONDS", 20)
+    PDF_EXTRACT_WORKERS: int = _get_env_int("PDF_EXTRACT_WORKERS", 1)
+    PDF_PARALLEL_MIN_PAGES: int = _get_env_int("PDF_PARALLEL_MIN_PAGES", 32)
+    UPLOAD_SPOOL_MAX_BYTES: int = _get_env_int("UPLOAD_SPOOL_MAX_BYTES", 8 * 1024 * 1024)
+    INGEST_WORKERS: int = _get_env_int("INGEST_WORKERS", 2)
+    INGEST_QUEUE_SIZE: int = _get_env_int("INGEST_QUEUE_SIZE", 16)
+    UPLOAD_WAIT: bool = _get_env_bool("UPLOAD_WAIT", False)
+    UPLOAD_WAIT_TIMEOUT_SECONDS: int = _get_env_int("UPLOAD_WAIT_TIMEOUT_SECONDS", 600)
     CORS_ORIGINS: list[str] = field(
         default_factory=lambda: [
             origin.strip()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+_V = TypeVar("_V")
+
+# SQLite caps the number of host parameters per statement.
+_SQL_BATCH = 500
+# Approximate per-row cost of the key, timestamp and page bookkeeping.
+_ROW_OVERHEAD_BYTES = 64
+# Eviction frees space down to this fraction of the budget to avoid thrashing.
+_LOW_WATERMARK = 0.9
+
+
+def _key(model: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).digest()
+
+
+def _pack(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> list[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by (model, sha256 of chunk text).
+
+    Vectors are stored as packed float32 blobs in SQLite. When the stored
+    vectors exceed ``max_bytes``, the least recently used rows are deleted.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._bytes = self._measure()
+
+    def get_many(self, model: str, texts: list[str]) -> list[list[float] | None]:
+        keys = [_key(model, text) for text in texts]
+        found: dict[bytes, bytes] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), _SQL_BATCH):
+                batch = keys[start : start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE key IN ({placeholders})",
+                        [now, *batch],
+                    )
+            hits = sum(1 for key in keys if key in found)
+            self._hits += hits
+            self._misses += len(keys) - hits
+        return [_unpack(found[key]) if key in found else None for key in keys]
+
+    def put_many(self, model: str, texts: list[str], vectors: list[list[float]]) -> None:
+        if not texts:
+            return
+        now = time.time()
+        rows = [(_key(model, text), _pack(vector), now) for text, vector in zip(texts, vectors)]
+        added = sum(len(blob) + _ROW_OVERHEAD_BYTES for _, blob, _ in rows)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._bytes += added
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def stats(self) -> dict[str, float | int]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _measure(self) -> int:
+        row = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        return row[1] + row[0] * _ROW_OVERHEAD_BYTES
+
+    def _evict(self) -> None:
+        # Recompute first: concurrent INSERT OR IGNOREs may have over-counted.
+        self._bytes = self._measure()
+        target = int(self.max_bytes * _LOW_WATERMARK)
+        while self._bytes > target:
+            row_bytes = self._conn.execute(
+                "SELECT AVG(LENGTH(vector)) FROM embeddings"
+            ).fetchone()[0]
+            if not row_bytes:
+                break
+            excess_rows = int((self._bytes - target) / (row_bytes + _ROW_OVERHEAD_BYTES)) + 1
+            deleted = self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess_rows,),
+            ).rowcount
+            self._evictions += deleted
+            self._bytes = self._measure()
+            if deleted <= 0:
+                break
+
+
+class LRUCache(Generic[_V]):
+    """Small thread-safe in-memory LRU map with hit/miss counters."""
+
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max_items
+        self._items: OrderedDict[Hashable, _V] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> _V | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._items.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: _V) -> None:
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self) -> dict[str, float | int]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "items": len(self._items),
+                "max_items": self.max_items,
+            }
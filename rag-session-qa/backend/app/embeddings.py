@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain
+from typing import Iterable, Iterator
+
+from openai import APIConnectionError, APIStatusError
+
+from .clients import async_client, client
+from .config import settings
+from .embedding_cache import EmbeddingCache, LRUCache
+from .utils.tokens import count_tokens
+
+
+# Retries are handled by _create_with_retry so that backoff is applied per batch.
+_client = client.with_options(max_retries=0)
+
+# Shared by every ingest, so EMBED_MAX_IN_FLIGHT caps requests process-wide.
+_pool = ThreadPoolExecutor(
+    max_workers=max(1, settings.EMBED_MAX_IN_FLIGHT), thread_name_prefix="embed"
+)
+
+_cache: EmbeddingCache | None = None
+if settings.EMBED_CACHE_PATH:
+    try:
+        _cache = EmbeddingCache(settings.EMBED_CACHE_PATH, settings.EMBED_CACHE_MAX_BYTES)
+    except Exception:
+        _cache = None
+
+# Questions are embedded on the request path, so repeats skip the network entirely.
+_query_cache: LRUCache[list[float]] = LRUCache(settings.QUERY_EMBED_CACHE_SIZE)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, APIConnectionError):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def _retry_delay(exc: Exception, attempt: int) -> float:
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), settings.EMBED_RETRY_MAX_DELAY_SECONDS)
+        except ValueError:
+            pass
+    delay = min(settings.EMBED_RETRY_MAX_DELAY_SECONDS, 0.5 * 2**attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _create_with_retry(model: str, texts: list[str]) -> list[list[float]]:
+    attempt = 0
+    while True:
+        try:
+            embed_resp = _client.embeddings.create(
+                model=model,
+                input=texts,
+            )
+            return [item.embedding for item in sorted(embed_resp.data, key=lambda d: d.index)]
+        except Exception as exc:
+            if attempt >= settings.EMBED_MAX_RETRIES or not _is_retryable(exc):
+                raise
+            time.sleep(_retry_delay(exc, attempt))
+            attempt += 1
+
+
+async def _acreate_with_retry(model: str, texts: list[str]) -> list[list[float]]:
+    attempt = 0
+    embeddings = async_client().with_options(max_retries=0).embeddings
+    while True:
+        try:
+            embed_resp = await embeddings.create(
+                model=model,
+                input=texts,
+            )
+            return [item.embedding for item in sorted(embed_resp.data, key=lambda d: d.index)]
+        except Exception as exc:
+            if attempt >= settings.EMBED_MAX_RETRIES or not _is_retryable(exc):
+                raise
+            await asyncio.sleep(_retry_delay(exc, attempt))
+            attempt += 1
+
+
+def _embed_batch(model: str, texts: list[str]) -> list[list[float]]:
+    vectors = _cache.get_many(model, texts) if _cache is not None else [None] * len(texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if not missing:
+        return vectors
+
+    miss_texts = [texts[i] for i in missing]
+    fresh = _create_with_retry(model, miss_texts)
+    for i, vector in zip(missing, fresh):
+        vectors[i] = vector
+    if _cache is not None:
+        _cache.put_many(model, miss_texts, fresh)
+    return vectors
+
+
+async def _aembed_batch(model: str, texts: list[str]) -> list[list[float]]:
+    # The disk cache is SQLite and put_many may evict, so both run on a worker thread.
+    vectors = await asyncio.to_thread(_cache.get_many, model, texts) if _cache is not None else [None] * len(texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if not missing:
+        return vectors
+
+    miss_texts = [texts[i] for i in missing]
+    fresh = await _acreate_with_retry(model, miss_texts)
+    for i, vector in zip(missing, fresh):
+        vectors[i] = vector
+    if _cache is not None:
+        await asyncio.to_thread(_cache.put_many, model, miss_texts, fresh)
+    return vectors
+
+
+def _iter_batches(texts: Iterable[str], model: str) -> Iterator[list[str]]:
+    """Group texts into requests that respect the item and token limits."""
+    max_items = max(1, settings.EMBED_BATCH_MAX_ITEMS)
+    max_tokens = max(1, settings.EMBED_BATCH_MAX_TOKENS)
+    batch: list[str] = []
+    batch_tokens = 0
+    for text in texts:
+        tokens = count_tokens(text, model)
+        if batch and (len(batch) >= max_items or batch_tokens + tokens > max_tokens):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def embed_batches(texts: Iterable[str]) -> Iterator[tuple[list[str], list[list[float]]]]:
+    """Yield ``(batch, vectors)`` pairs in input order.
+
+    Batches are sent concurrently on the shared pool, at most
+    ``EMBED_MAX_IN_FLIGHT`` ahead of the consumer. A single batch is embedded
+    on the calling thread so short requests never queue behind large ingests.
+    """
+    model = settings.OPENAI_EMBED_MODEL
+    batches = _iter_batches(texts, model)
+    first = next(batches, None)
+    if first is None:
+        return
+    second = next(batches, None)
+    if second is None:
+        yield first, _embed_batch(model, first)
+        return
+
+    window: deque[tuple[list[str], Future]] = deque()
+    limit = max(1, settings.EMBED_MAX_IN_FLIGHT)
+    try:
+        for batch in chain([first, second], batches):
+            window.append((batch, _pool.submit(_embed_batch, model, batch)))
+            if len(window) >= limit:
+                head, future = window.popleft()
+                yield head, future.result()
+        while window:
+            head, future = window.popleft()
+            yield head, future.result()
+    finally:
+        for _, future in window:
+            future.cancel()
+
+
+def _normalize_query(text: str) -> str:
+    return " ".join(text.split())
+
+
+async def aembed_query(text: str) -> list[float]:
+    """Embed a question, reusing the vector of an identical recent question.
+
+    Questions that differ only in case or whitespace share one entry.
+    """
+    model = settings.OPENAI_EMBED_MODEL
+    normalized = _normalize_query(text)
+    key = (model, normalized.casefold())
+    vector = _query_cache.get(key)
+    if vector is None:
+        vector = (await _aembed_batch(model, [normalized]))[0]
+        _query_cache.put(key, vector)
+    return vector
+
+
+async def aembed_queries(texts: list[str]) -> list[list[float]]:
+    """Embed several questions in order, sending every cache miss in one request.
+
+    Misses only split into more requests if they exceed the
+    ``EMBED_BATCH_MAX_ITEMS`` / ``EMBED_BATCH_MAX_TOKENS`` limits.
+    """
+    model = settings.OPENAI_EMBED_MODEL
+    normalized = [_normalize_query(text) for text in texts]
+    keys = [(model, text.casefold()) for text in normalized]
+    found: dict[tuple[str, str], list[float]] = {}
+    missing: dict[tuple[str, str], str] = {}
+    for key, text in zip(keys, normalized):
+        if key in found or key in missing:
+            continue
+        vector = _query_cache.get(key)
+        if vector is None:
+            missing[key] = text
+        else:
+            found[key] = vector
+    if missing:
+        miss_keys = list(missing)
+        vectors: list[list[float]] = []
+        for batch in _iter_batches(missing.values(), model):
+            vectors.extend(await _aembed_batch(model, batch))
+        for key, vector in zip(miss_keys, vectors):
+            _query_cache.put(key, vector)
+            found[key] = vector
+    return [found[key] for key in keys]
+
+
+def embedding_cache_stats() -> dict | None:
+    return _cache.stats() if _cache is not None else None
+
+
+def query_embedding_cache_stats() -> dict:
+    return _query_cache.stats()
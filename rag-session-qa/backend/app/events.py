@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+_NAME = r"[A-Z][A-Za-z'.-]*(?:[ \t]+[A-Z][A-Za-z'.-]*){0,3}"
+
+# "19.4 \n6 \nCorbin Bosch to Hardik Pandya, SIX, powerful hit!" - the over and
+# the result line ("6", "W", "F", "1lb") are optional because extraction
+# sometimes drops or merges them.
+_EVENT = re.compile(
+    rf"(?:(?P<over>\b\d{{1,2}}(?:\.\d)?)\s+(?:(?:[0-6W]|[0-9A-Z][0-9a-z]{{0,3}}[ \t]*(?=\n))\s+)?)?"
+    rf"(?P<anchor>(?P<bowler>{_NAME})\s+to\s+(?P<batter>{_NAME}),\s*(?P<outcome>[A-Za-z0-9][A-Za-z0-9 ]{{0,40}}?))"
+    r"\s*(?:[,!.]|$)",
+    re.MULTILINE,
+)
+
+# "Hardik Pandya c Marco Jansen b Corbin Bosch 30(10) [4s-2 6s-3]"
+_STATS = re.compile(
+    rf"(?P<player>{_NAME})\s+(?P<anchor>(?:c\s|b\s|st\s|lbw\b|run out\b|not out\b|hit wicket\b)"
+    r"[^\[\]]{0,80}?(?P<runs>\d+)\((?P<balls>\d+)\)\s*\[4s-(?P<fours>\d+)\s+6s-(?P<sixes>\d+)\])"
+)
+
+# Matches are bounded in length, so anything further than this from the end
+# of the buffer is complete and can be parsed and dropped.
+_MARGIN = 1024
+# How many chunks ahead provenance matching looks before giving up on an event.
+_LOOKAHEAD = 4
+
+
+def _normalize_name(name: str) -> str:
+    return " ".join(re.findall(r"[a-z]+", name.lower()))
+
+
+def _collapse(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _outcome(raw: str) -> str:
+    text = raw.strip().lower()
+    if text.startswith("out"):
+        return "wicket"
+    for kind in ("six", "four", "wide", "no ball", "no run", "leg byes", "byes"):
+        if text.startswith(kind):
+            return kind
+    return text
+
+
+@dataclass
+class BallEvent:
+    over: str | None
+    bowler: str
+    batter: str
+    outcome: str
+    anchor: str
+    chunk_index: int | None = None
+
+
+@dataclass
+class PlayerStats:
+    player: str
+    runs: int
+    balls: int
+    fours: int
+    sixes: int
+    anchor: str
+    chunk_index: int | None = None
+
+
+@dataclass
+class CountResult:
+    player: str
+    count: int
+    chunk_indices: list[int]
+
+
+@dataclass
+class EventTable:
+    """Ball-by-ball events and batting stats parsed from a whole document.
+
+    Built once per index at ingest. Per-batter outcome counts and the chunks
+    that support them are aggregated when chunks are attached, and every
+    contiguous run of words in a player's name is an alias, so ``count``
+    is a couple of dict lookups regardless of document size.
+    """
+
+    events: list[BallEvent] = field(default_factory=list)
+    stats: list[PlayerStats] = field(default_factory=list)
+    _aliases: dict[str, set[str]] = field(default_factory=dict)
+    _counts: dict[str, Counter] = field(default_factory=dict)
+    _sources: dict[tuple[str, str], list[int]] = field(default_factory=dict)
+    _stats_by_player: dict[str, PlayerStats] = field(default_factory=dict)
+    _display: dict[str, str] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.events) + len(self.stats)
+
+    def attach_chunks(self, chunks: Iterable[tuple[int, str]]) -> None:
+        """Record which chunk each event and stats line came from, then aggregate.
+
+        ``chunks`` must be in document order. Both sides are walked once: each
+        item is assigned to the first chunk at or after the previous match
+        whose text contains it, so overlapping chunks never count it twice.
+        """
+        chunk_list = [(chunk_index, _collapse(text)) for chunk_index, text in chunks]
+        for items in (self.events, self.stats):
+            position = 0
+            offset = 0
+            for item in items:
+                anchor = _collapse(item.anchor)
+                for ahead in range(position, min(len(chunk_list), position + _LOOKAHEAD)):
+                    found = chunk_list[ahead][1].find(anchor, offset if ahead == position else 0)
+                    if found >= 0:
+                        item.chunk_index = chunk_list[ahead][0]
+                        if ahead != position:
+                            position, offset = ahead, 0
+                        offset = found + 1
+                        break
+        self._aggregate()
+
+    def count(self, player: str, outcome: str) -> CountResult | None:
+        """Count ``outcome`` ("four"/"six") for the batter(s) matching ``player``.
+
+        A final stats line is preferred when exactly one player matches;
+        otherwise the matching ball-by-ball events are counted. Returns None
+        when no player in the document matches the name.
+        """
+        names = self._aliases.get(_normalize_name(player))
+        if not names:
+            return None
+        ordered = sorted(names)
+        if len(ordered) == 1 and ordered[0] in self._stats_by_player:
+            stats = self._stats_by_player[ordered[0]]
+            count = stats.fours if outcome == "four" else stats.sixes
+            chunks = [stats.chunk_index] if stats.chunk_index is not None else []
+            return CountResult(stats.player, count, chunks)
+        count = sum(self._counts.get(name, Counter())[outcome] for name in ordered)
+        chunks = sorted({i for name in ordered for i in self._sources.get((name, outcome), [])})
+        display = self._display[ordered[0]] if len(ordered) == 1 else player
+        return CountResult(display, count, chunks)
+
+    def _aggregate(self) -> None:
+        self._aliases.clear()
+        self._counts.clear()
+        self._sources.clear()
+        self._stats_by_player.clear()
+        self._display.clear()
+        for event in self.events:
+            name = _normalize_name(event.batter)
+            self._add_aliases(name)
+            self._display.setdefault(name, event.batter)
+            self._counts.setdefault(name, Counter())[event.outcome] += 1
+            if event.chunk_index is not None:
+                sources = self._sources.setdefault((name, event.outcome), [])
+                if not sources or sources[-1] != event.chunk_index:
+                    sources.append(event.chunk_index)
+        for stats in self.stats:
+            name = _normalize_name(stats.player)
+            self._add_aliases(name)
+            self._display.setdefault(name, stats.player)
+            self._stats_by_player[name] = stats
+
+    def _add_aliases(self, name: str) -> None:
+        words = name.split()
+        for start in range(len(words)):
+            for end in range(start + 1, len(words) + 1):
+                self._aliases.setdefault(" ".join(words[start:end]), set()).add(name)
+
+
+class EventParser:
+    """Incrementally parses commentary text fed in document order.
+
+    Fed pieces are joined with newlines, as ``iter_pages`` pieces join into
+    the document text, so a name or event never runs across a piece boundary.
+    """
+
+    def __init__(self) -> None:
+        self.table = EventTable()
+        self._buffer = ""
+        self._fed = False
+
+    def feed(self, text: str) -> None:
+        self._buffer += "\n" + text if self._fed else text
+        self._fed = True
+        if len(self._buffer) > 2 * _MARGIN:
+            self._parse(len(self._buffer) - _MARGIN)
+
+    def close(self) -> EventTable:
+        self._parse(len(self._buffer))
+        self._buffer = ""
+        return self.table
+
+    def tee(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Yield ``pieces`` unchanged while feeding them to the parser."""
+        for piece in pieces:
+            self.feed(piece)
+            yield piece
+
+    def _parse(self, cut: int) -> None:
+        consumed = cut
+        for match in _EVENT.finditer(self._buffer):
+            if match.start() >= cut:
+                break
+            self.table.events.append(
+                BallEvent(
+                    over=match.group("over"),
+                    bowler=match.group("bowler").strip(),
+                    batter=match.group("batter").strip(),
+                    outcome=_outcome(match.group("outcome")),
+                    anchor=match.group("anchor"),
+                )
+            )
+            consumed = max(consumed, match.end())
+        for match in _STATS.finditer(self._buffer):
+            if match.start() >= cut:
+                break
+            self.table.stats.append(
+                PlayerStats(
+                    player=match.group("player").strip(),
+                    runs=int(match.group("runs")),
+                    balls=int(match.group("balls")),
+                    fours=int(match.group("fours")),
+                    sixes=int(match.group("sixes")),
+                    anchor=match.group("player") + " " + match.group("anchor"),
+                )
+            )
+            consumed = max(consumed, match.end())
+        self._buffer = self._buffer[consumed:]
+
@@ -1,62 +1,152 @@
 from __future__ import annotations
 
-import os
-import tempfile
-from uuid import uuid4
-
-from openai import OpenAI
+import hashlib
+from typing import BinaryIO, Callable, Iterator
 
 from .config import settings
-from .utils.loaders import extract_text
-from .utils.chunking import chunk_text
-from .vectorstore import reset_session, upsert_chunks
-
-
-_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
-
-def ingest_upload(file_bytes: bytes, filename: str, content_type: str | None) -> dict:
+from .embeddings import embed_batches
+from .events import EventParser
+from .utils.loaders import guess_type, iter_pages
+from .utils.chunking import iter_chunks, iter_token_chunks
+from .vectorstore import (
+    attach_session,
+    delete_session,
+    get_chunks,
+    reset_session,
+    seal_session,
+    set_artifact,
+    upsert_chunks,
+)
+
+
+# Called with (chunks_embedded, chunks_total); the total is None until chunking finishes.
+ProgressCallback = Callable[[int, int | None], None]
+
+
+def _content_key(file_bytes: bytes, file_type: str) -> str:
+    """Hash of the upload plus every setting that shapes its index."""
+    digest = hashlib.sha256()
+    if settings.CHUNK_MODE == "tokens":
+        chunking = f"tokens|{settings.CHUNK_TOKENS}|{settings.CHUNK_OVERLAP_TOKENS}"
+    else:
+        chunking = f"{settings.CHUNK_SIZE}|{settings.CHUNK_OVERLAP}"
+    digest.update(f"{file_type}|{chunking}|{settings.OPENAI_EMBED_MODEL}|".encode())
+    digest.update(file_bytes)
+    return digest.hexdigest()
+
+
+def prepare_upload(file_bytes: bytes, filename: str, content_type: str | None) -> str:
+    """Validate an upload and return its content key."""
     if not settings.OPENAI_API_KEY:
         raise ValueError("OPENAI_API_KEY is not set.")
-
-    session_id = str(uuid4())
-    reset_session(session_id)
-
-    suffix = os.path.splitext(filename)[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(file_bytes)
-        tmp_path = tmp.name
-
+    return _content_key(file_bytes, guess_type(content_type, filename))
+
+
+def index_upload(
+    session_id: str,
+    key: str,
+    source: bytes | BinaryIO,
+    filename: str,
+    content_type: str | None,
+    on_progress: ProgressCallback | None = None,
+) -> int:
+    """Build (or reuse) the index for ``session_id`` and return its chunk count."""
+    num_chunks = attach_session(session_id, key)
+    if num_chunks is not None:
+        if on_progress is not None:
+            on_progress(num_chunks, num_chunks)
+        return num_chunks
+
+    reset_session(session_id, content_key=key)
     try:
-        text = extract_text(tmp_path, content_type, filename)
-    finally:
-        try:
-            os.remove(tmp_path)
-        except OSError:
-            pass
-
-    if not text.strip():
-        raise ValueError("No readable text found in the document.")
-
-    chunks = chunk_text(text, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
-    if not chunks:
-        raise ValueError("Document produced no chunks after processing.")
-
-    embed_resp = _client.embeddings.create(
-        model=settings.OPENAI_EMBED_MODEL,
-        input=chunks,
+        num_chunks = _index_document(session_id, source, filename, content_type, on_progress)
+        seal_session(session_id)
+    except Exception:
+        delete_session(session_id)
+        raise
+    return num_chunks
+
+
+def _document_chunks(
+    source: bytes | BinaryIO, filename: str, content_type: str | None
+) -> tuple[EventParser, Iterator[str]]:
+    """Lazy chunk stream for a document, with the page stream teed into an event parser."""
+    events = EventParser()
+    pages = events.tee(
+        iter_pages(
+            source,
+            content_type,
+            filename,
+            pdf_workers=settings.PDF_EXTRACT_WORKERS,
+            pdf_parallel_min_pages=settings.PDF_PARALLEL_MIN_PAGES,
+        )
     )
-    embeddings = [item.embedding for item in embed_resp.data]
-
+    if settings.CHUNK_MODE == "tokens":
+        chunks = iter_token_chunks(
+            pages, settings.CHUNK_TOKENS, settings.CHUNK_OVERLAP_TOKENS, settings.OPENAI_EMBED_MODEL
+        )
+    else:
+        chunks = iter_chunks(pages, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+    return events, chunks
+
+
+def _upsert_batch(
+    session_id: str, filename: str, start: int, batch: list[str], embeddings: list[list[float]]
+) -> None:
     metadatas = [
         {
             "session_id": session_id,
-            "chunk_index": i,
+            "chunk_index": start + i,
             "source_filename": filename,
         }
-        for i in range(len(chunks))
+        for i in range(len(batch))
     ]
+    upsert_chunks(session_id, batch, metadatas, embeddings)
+
+
+def _finish_document(session_id: str, num_chunks: int, events: EventParser) -> None:
+    if num_chunks == 0:
+        raise ValueError("No readable text found in the document.")
 
-    upsert_chunks(session_id, chunks, metadatas, embeddings)
+    table = events.close()
+    table.attach_chunks((chunk["metadata"]["chunk_index"], chunk["text"]) for chunk in get_chunks(session_id))
+    set_artifact(session_id, "events", table)
+
+
+def _index_document(
+    session_id: str,
+    source: bytes | BinaryIO,
+    filename: str,
+    content_type: str | None,
+    on_progress: ProgressCallback | None = None,
+) -> int:
+    """Extract, chunk, embed and upsert as overlapping streaming stages.
+
+    Pages are parsed lazily and chunked as they arrive; embedding batches are
+    sent while later pages are still being parsed, and each finished batch is
+    upserted immediately, so only a window of batches is held in memory.
+    The page stream is also fed to the event parser, whose table is linked to
+    the stored chunks once the last batch is in.
+    """
+    num_chunks = 0
+    num_chunked = 0
+    chunking_done = False
+
+    def _counted(chunks: Iterator[str]) -> Iterator[str]:
+        nonlocal num_chunked, chunking_done
+        for chunk in chunks:
+            num_chunked += 1
+            yield chunk
+        chunking_done = True
+
+    events, chunks = _document_chunks(source, filename, content_type)
+    chunks = _counted(chunks)
+    for batch, embeddings in embed_batches(chunks):
+        _upsert_batch(session_id, filename, num_chunks, batch, embeddings)
+        num_chunks += len(batch)
+        if on_progress is not None:
+            on_progress(num_chunks, num_chunked if chunking_done else None)
+
+    _finish_document(session_id, num_chunks, events)
+    return num_chunks
 
-    return {"session_id": session_id, "num_chunks": len(chunks)}
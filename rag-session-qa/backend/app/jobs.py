@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable
+from uuid import uuid4
+
+from .config import settings
+from .ingest import index_upload, prepare_upload
+from .rag import precompute_summary
+from .utils.loaders import spool_upload
+from .vectorstore import attach_session
+
+# Finished job records are kept this long so clients can still poll them.
+_JOB_RETENTION_SECONDS = 3600
+
+
+class IngestQueueFullError(RuntimeError):
+    """All ingest workers are busy and the pending queue is full."""
+
+
+@dataclass
+class IngestJob:
+    session_id: str
+    filename: str
+    status: str = "indexing"
+    chunks_embedded: int = 0
+    chunks_total: int | None = None
+    error: str | None = None
+    # HTTP status for ``error``: 400 for problems with the document, 500 otherwise.
+    error_status: int | None = None
+    updated_at: float = field(default_factory=time.monotonic)
+    # Set once the job is ready or failed.
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+    # Called (under ``_lock``) when ``done`` is set; see ``wait_for_job``.
+    _on_done: list[Callable[[], None]] = field(default_factory=list, repr=False)
+
+
+_pool = ThreadPoolExecutor(max_workers=max(1, settings.INGEST_WORKERS), thread_name_prefix="ingest")
+# Running plus queued jobs; beyond this /upload is rejected instead of queueing forever.
+_slots = threading.BoundedSemaphore(max(1, settings.INGEST_WORKERS) + max(0, settings.INGEST_QUEUE_SIZE))
+_jobs: OrderedDict[str, IngestJob] = OrderedDict()
+_lock = threading.Lock()
+
+
+def submit_upload(file_bytes: bytes, filename: str, content_type: str | None) -> IngestJob:
+    """Register an ingest job and run it on the background pool.
+
+    Validation errors are raised synchronously. Uploads whose content is
+    already indexed are attached immediately and come back ``ready``.
+    """
+    key = prepare_upload(file_bytes, filename, content_type)
+    job = IngestJob(session_id=str(uuid4()), filename=filename)
+
+    num_chunks = attach_session(job.session_id, key)
+    if num_chunks is not None:
+        job.status = "ready"
+        job.chunks_embedded = job.chunks_total = num_chunks
+        _set_done(job)
+        _register(job)
+        return job
+
+    if not _slots.acquire(blocking=False):
+        raise IngestQueueFullError("Too many documents are being indexed. Please retry shortly.")
+    _register(job)
+    # Queued jobs may wait a while; keep large uploads on disk rather than in RAM.
+    source = spool_upload(file_bytes, settings.UPLOAD_SPOOL_MAX_BYTES)
+    try:
+        _pool.submit(_run, job, key, source, filename, content_type)
+    except Exception:
+        _slots.release()
+        _close(source)
+        raise
+    return job
+
+
+async def wait_for_job(job: IngestJob, timeout: float) -> None:
+    """Wait up to ``timeout`` seconds for ``job`` to finish, without holding a thread."""
+    loop = asyncio.get_running_loop()
+    finished = loop.create_future()
+
+    def _wake() -> None:
+        try:
+            loop.call_soon_threadsafe(lambda: finished.done() or finished.set_result(None))
+        except RuntimeError:
+            pass  # The loop has closed; nobody is waiting any more.
+
+    with _lock:
+        if job.done.is_set():
+            return
+        job._on_done.append(_wake)
+    try:
+        await asyncio.wait_for(finished, timeout)
+    except asyncio.TimeoutError:
+        with _lock:
+            if _wake in job._on_done:
+                job._on_done.remove(_wake)
+
+
+def get_job(session_id: str) -> IngestJob | None:
+    with _lock:
+        return _jobs.get(session_id)
+
+
+def _register(job: IngestJob) -> None:
+    cutoff = time.monotonic() - _JOB_RETENTION_SECONDS
+    with _lock:
+        for session_id, existing in list(_jobs.items()):
+            if existing.updated_at > cutoff:
+                break
+            if existing.status != "indexing":
+                del _jobs[session_id]
+        _jobs[job.session_id] = job
+
+
+def _set_done(job: IngestJob) -> None:
+    with _lock:
+        job.done.set()
+        callbacks, job._on_done = job._on_done, []
+    for callback in callbacks:
+        callback()
+
+
+def _close(source: bytes | BinaryIO) -> None:
+    if not isinstance(source, bytes):
+        source.close()
+
+
+def _run(job: IngestJob, key: str, source: bytes | BinaryIO, filename: str, content_type: str | None) -> None:
+    def _progress(embedded: int, total: int | None) -> None:
+        job.chunks_embedded = embedded
+        job.chunks_total = total
+        job.updated_at = time.monotonic()
+
+    try:
+        num_chunks = index_upload(job.session_id, key, source, filename, content_type, _progress)
+    except Exception as exc:
+        job.error = str(exc) if isinstance(exc, ValueError) else f"Upload failed: {exc}"
+        job.error_status = 400 if isinstance(exc, ValueError) else 500
+        job.status = "failed"
+    else:
+        job.chunks_embedded = job.chunks_total = num_chunks
+        job.status = "ready"
+        precompute_summary(job.session_id)
+    finally:
+        job.updated_at = time.monotonic()
+        _close(source)
+        _slots.release()
+        _set_done(job)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter
+
+# Keeps dotted and hyphenated tokens whole, so over numbers ("16.4") and
+# batting stats ("4s-3") stay searchable as exact terms.
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+# Question words that would otherwise match every chunk mentioning them.
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from had has have how i in is it its many "
+    "much of on or that the their there this to was were what when where which who whom "
+    "why will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index over one session's chunks, scored with Okapi BM25.
+
+    Documents are identified by their insertion position. Postings are
+    appended as chunks are ingested, so the index is complete as soon as the
+    last batch has been upserted; IDF is computed at query time.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths: list[int] = []
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, texts: list[str]) -> None:
+        with self._lock:
+            for text in texts:
+                doc = len(self._lengths)
+                terms = Counter(tokenize(text))
+                for term, tf in terms.items():
+                    self._postings.setdefault(term, []).append((doc, tf))
+                length = sum(terms.values())
+                self._lengths.append(length)
+                self._total_length += length
+
+    def search(self, query: str, top_k: int) -> list[tuple[int, float]]:
+        """Return up to ``top_k`` ``(position, score)`` pairs, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._lengths)
+            if not terms or not n_docs or top_k <= 0:
+                return []
+            avg_length = self._total_length / n_docs or 1.0
+            scores: dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1.0 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc, tf in postings:
+                    norm = self.k1 * (1.0 - self.b + self.b * self._lengths[doc] / avg_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top_k]
+
+
+def reciprocal_rank_fusion(
+    rankings: list[tuple[list[str], float]], k: int, top_k: int
+) -> list[tuple[str, float]]:
+    """Fuse ranked id lists, each with a weight, into one ranking.
+
+    Each list contributes ``weight / (k + rank)`` to every id it contains, so
+    ids ranked well by both retrievers rise above ids only one of them found.
+    """
+    fused: dict[str, float] = {}
+    for ids, weight in rankings:
+        if weight <= 0:
+            continue
+        for rank, item_id in enumerate(ids, start=1):
+            fused[item_id] = fused.get(item_id, 0.0) + weight / (k + rank)
+    ranked = sorted(fused.items(), key=lambda item: -item[1])
+    return ranked[:top_k]
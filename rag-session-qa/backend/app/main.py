@@ -1,12 +1,38 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from typing import Any, AsyncIterator
+
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 from .config import settings
-from .ingest import ingest_upload
-from .rag import answer_question, summarise
-from .schemas import UploadResponse, AskRequest, AskResponse, SummaryRequest, SummaryResponse
+from .embeddings import embedding_cache_stats, query_embedding_cache_stats
+from .jobs import IngestQueueFullError, get_job, submit_upload, wait_for_job
+from .rag import (
+    answer_cache_stats,
+    answer_question_async,
+    answer_questions_async,
+    coalescing_stats,
+    context_packing_stats,
+    stream_answer_async,
+    stream_summary_async,
+    summarise_async,
+    summary_cache_stats,
+)
+from .schemas import (
+    UploadResponse,
+    SessionStatusResponse,
+    AskRequest,
+    AskResponse,
+    AskBatchRequest,
+    AskBatchResponse,
+    SummaryRequest,
+    SummaryResponse,
+)
+from .vectorstore import SessionExpiredError, has_session, session_stats
 
 app = FastAPI(title="Session RAG Q&A")
 
@@ -24,8 +50,27 @@ def health():
     return {"ok": True}
 
 
+@app.get("/stats")
+def stats():
+    return {
+        "sessions": session_stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "query_embedding_cache": query_embedding_cache_stats(),
+        "answer_cache": answer_cache_stats(),
+        "context_packing": context_packing_stats(),
+        "summary_cache": summary_cache_stats(),
+        "coalescing": coalescing_stats(),
+    }
+
+
 @app.post("/upload", response_model=UploadResponse)
-async def upload(file: UploadFile = File(...)):
+async def upload(file: UploadFile = File(...), wait: bool | None = None):
+    """Accept a document for indexing.
+
+    By default this returns at once with ``status: "indexing"``. With
+    ``?wait=true`` (or ``UPLOAD_WAIT`` set) it returns once the document is
+    indexed, for clients that call ``/ask`` straight after uploading.
+    """
     if file is None:
         raise HTTPException(status_code=400, detail="No file provided.")
 
@@ -34,28 +79,68 @@ async def upload(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Uploaded file is empty.")
 
     try:
-        result = ingest_upload(content, file.filename, file.content_type)
+        # Hashing and spooling the upload are blocking; keep them off the event loop.
+        job = await asyncio.to_thread(submit_upload, content, file.filename, file.content_type)
+    except IngestQueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Upload failed: {exc}")
 
+    if settings.UPLOAD_WAIT if wait is None else wait:
+        await wait_for_job(job, settings.UPLOAD_WAIT_TIMEOUT_SECONDS)
+        if job.status == "failed":
+            raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+
+    if job.status == "ready":
+        message = "Document indexed successfully."
+    else:
+        message = "Document accepted for indexing."
     return UploadResponse(
-        session_id=result["session_id"],
-        message="Document indexed successfully.",
-        num_chunks=result["num_chunks"],
+        session_id=job.session_id,
+        status=job.status,
+        message=message,
+        num_chunks=job.chunks_total,
     )
 
 
+@app.get("/sessions/{session_id}/status", response_model=SessionStatusResponse)
+def session_status(session_id: str):
+    job = get_job(session_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Session not found. Please upload a document.")
+
+    status = job.status
+    if status == "ready" and not has_session(session_id):
+        status = "expired"
+    return SessionStatusResponse(
+        session_id=job.session_id,
+        status=status,
+        chunks_embedded=job.chunks_embedded,
+        chunks_total=job.chunks_total,
+        error=job.error,
+    )
+
+
+def _require_indexed(session_id: str) -> None:
+    job = get_job(session_id)
+    if job is not None and job.status == "indexing":
+        raise HTTPException(status_code=409, detail="Document is still being indexed. Please retry shortly.")
+
+
 @app.post("/ask", response_model=AskResponse)
-def ask(request: AskRequest):
+async def ask(request: AskRequest):
     if not request.session_id:
         raise HTTPException(status_code=400, detail="session_id is required.")
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question is required.")
+    _require_indexed(request.session_id)
 
     try:
-        result = answer_question(request.session_id, request.question)
+        result = await answer_question_async(request.session_id, request.question)
+    except SessionExpiredError as exc:
+        raise HTTPException(status_code=410, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
@@ -64,16 +149,106 @@ def ask(request: AskRequest):
     return AskResponse(**result)
 
 
+@app.post("/ask/batch", response_model=AskBatchResponse)
+async def ask_batch(request: AskBatchRequest):
+    """Answer several questions about one session; ``results`` follows the order of ``questions``."""
+    if not request.session_id:
+        raise HTTPException(status_code=400, detail="session_id is required.")
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="At least one question is required.")
+    if len(request.questions) > settings.ASK_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.ASK_BATCH_MAX_QUESTIONS} questions per batch."
+        )
+    _require_indexed(request.session_id)
+
+    asked = [i for i, question in enumerate(request.questions) if question.strip()]
+    results: list[dict[str, Any]] = [{"error": "Question is required."} for _ in request.questions]
+    try:
+        answers = await answer_questions_async(request.session_id, [request.questions[i] for i in asked])
+    except SessionExpiredError as exc:
+        raise HTTPException(status_code=410, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Ask failed: {exc}")
+
+    for i, answer in zip(asked, answers):
+        results[i] = answer
+    return AskBatchResponse(results=results)
+
+
 @app.post("/summary", response_model=SummaryResponse)
-def summary(request: SummaryRequest):
+async def summary(request: SummaryRequest):
     if not request.session_id:
         raise HTTPException(status_code=400, detail="session_id is required.")
+    _require_indexed(request.session_id)
 
     try:
-        result = summarise(request.session_id)
+        result = await summarise_async(request.session_id)
+    except SessionExpiredError as exc:
+        raise HTTPException(status_code=410, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Summary failed: {exc}")
 
     return SummaryResponse(**result)
+
+
+async def _sse(events: AsyncIterator[tuple[str, dict[str, Any]]]) -> AsyncIterator[str]:
+    try:
+        async for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    except Exception as exc:
+        # Headers are already sent, so failures are reported in-band.
+        yield f"event: error\ndata: {json.dumps({'detail': f'Generation failed: {exc}'})}\n\n"
+
+
+def _event_stream(events: AsyncIterator[tuple[str, dict[str, Any]]]) -> StreamingResponse:
+    return StreamingResponse(
+        _sse(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/ask/stream")
+async def ask_stream(request: AskRequest):
+    """Server-sent events: ``citations`` once retrieval is done, ``token`` per
+    text delta, then ``done`` with the full answer (or ``error``)."""
+    if not request.session_id:
+        raise HTTPException(status_code=400, detail="session_id is required.")
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question is required.")
+    _require_indexed(request.session_id)
+
+    try:
+        events = await stream_answer_async(request.session_id, request.question)
+    except SessionExpiredError as exc:
+        raise HTTPException(status_code=410, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Ask failed: {exc}")
+
+    return _event_stream(events)
+
+
+@app.post("/summary/stream")
+async def summary_stream(request: SummaryRequest):
+    """Server-sent events, as for ``/ask/stream``, carrying the summary."""
+    if not request.session_id:
+        raise HTTPException(status_code=400, detail="session_id is required.")
+    _require_indexed(request.session_id)
+
+    try:
+        events = await stream_summary_async(request.session_id)
+    except SessionExpiredError as exc:
+        raise HTTPException(status_code=410, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Summary failed: {exc}")
+
+    return _event_stream(events)
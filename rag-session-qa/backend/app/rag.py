@@ -1,40 +1,95 @@
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
 import re
 
-from openai import OpenAI
-
+from .answer_cache import SemanticAnswerCache, SummaryCache
+from .clients import async_client, client as _client
 from .config import settings
-from .utils.prompts import build_answer_prompt, build_summary_prompt
-from .vectorstore import query, get_chunks
+from .embeddings import aembed_queries, aembed_query
+from .events import EventTable
+from .retrieval import retrieve_many
+from .singleflight import SingleFlight
+from .summarize import Note, amap_reduce, cite_notes, map_reduce, source_indices
+from .utils.context import PackingStats, pack
+from .utils.prompts import SUMMARY_PROMPT_VERSION, build_answer_prompt, build_summary_prompt
+from .vectorstore import get_artifact, get_chunks, get_chunks_by_index, index_version
+
+
+_packing = PackingStats()
+
+_answers = SemanticAnswerCache(
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+    max_sessions=settings.ANSWER_CACHE_MAX_SESSIONS,
+)
+
+# Everything besides the document that shapes a summary.
+_summaries = SummaryCache(
+    "|".join(
+        str(part)
+        for part in (
+            settings.OPENAI_MODEL,
+            SUMMARY_PROMPT_VERSION,
+            settings.MAX_CHUNKS_FOR_SUMMARY,
+            settings.CONTEXT_TOKEN_BUDGET,
+            settings.SUMMARY_MAP_TOKENS,
+            settings.SUMMARY_NOTE_MAX_TOKENS,
+        )
+    )
+)
+# Identical /ask and /summary requests that overlap wait for the first one.
+_ask_flight = SingleFlight()
+_summary_flight = SingleFlight()
+# The summary's context (its map-reduce, for long documents) is built once per
+# session at a time, whether for /summary, /summary/stream or the precompute.
+_summary_draft_flight = SingleFlight()
+
+# One summary at a time; its map-reduce calls still fan out on the summary pool.
+_precompute = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary-precompute")
 
 
-_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+def _citation(cite_id: str, chunk: dict[str, Any], text: str) -> dict[str, Any]:
+    snippet = text[:320] + ("..." if len(text) > 320 else "")
+    return {
+        "id": cite_id,
+        "chunk_id": chunk.get("chunk_id"),
+        "snippet": snippet,
+        "metadata": chunk.get("metadata", {}),
+    }
 
 
 def _build_context(chunks: list[dict[str, Any]]) -> tuple[str, list[dict[str, Any]], list[str]]:
-    context_lines: list[str] = []
-    citations: list[dict[str, Any]] = []
-    retrieval_context: list[str] = []
+    """Render chunks as cited context, packed into ``CONTEXT_TOKEN_BUDGET`` tokens.
 
+    Chunks are taken in the order given (relevance for answers, document
+    order for summaries); the packer truncates the last one that fits only
+    partly and drops the rest, which is recorded in ``context_packing_stats``.
+    """
+    entries: list[tuple[str, str, str]] = []
     for idx, chunk in enumerate(chunks):
         cite_id = f"C{idx + 1}"
         metadata = chunk.get("metadata", {})
-        text = chunk.get("text", "")
-        snippet = text[:320] + ("..." if len(text) > 320 else "")
-
-        citations.append(
-            {
-                "id": cite_id,
-                "chunk_id": chunk.get("chunk_id"),
-                "snippet": snippet,
-                "metadata": metadata,
-            }
-        )
-        context_lines.append(
-            f"[{cite_id}] (source: {metadata.get('source_filename', 'unknown')}, chunk: {metadata.get('chunk_index', 'n/a')})\n{text}"
-        )
+        chunk_label = metadata.get("chunk_index", "n/a")
+        merged = metadata.get("chunk_indices")
+        if merged:
+            chunk_label = f"{merged[0]}-{merged[-1]}"
+        header = f"[{cite_id}] (source: {metadata.get('source_filename', 'unknown')}, chunk: {chunk_label})"
+        entries.append((cite_id, header, chunk.get("text", "")))
+
+    packed, report = pack(entries, settings.CONTEXT_TOKEN_BUDGET, settings.OPENAI_MODEL)
+    _packing.record(report)
+
+    context_lines: list[str] = []
+    citations: list[dict[str, Any]] = []
+    retrieval_context: list[str] = []
+
+    for (cite_id, text), chunk, (_, header, _) in zip(packed, chunks, entries):
+        citations.append(_citation(cite_id, chunk, text))
+        context_lines.append(f"{header}\n{text}")
         retrieval_context.append(text)
 
     return "\n\n".join(context_lines), citations, retrieval_context
@@ -62,22 +117,17 @@ def _normalize_player_name(name: str) -> str | None:
     return " ".join(tokens)
 
 
-def _try_count_from_context(
-    question: str, chunks: list[dict[str, Any]]
-) -> tuple[str, list[int]] | None:
-    q = question.lower()
-    if not any(phrase in q for phrase in ["how many", "number of", "count of", "count"]):
-        return None
+def _count_from_events(question: str, table: EventTable) -> tuple[str, list[int]] | None:
+    """Answer a "how many fours/sixes did X hit" question from the event table.
 
-    term = None
+    Returns the answer and the chunk indexes that support it, or None when
+    the question does not name a countable outcome and a player.
+    """
+    q = question.lower()
     if any(t in q for t in ["four", "fours", "4"]):
-        term = "FOUR"
-        term_label = "four"
-        term_plural = "fours"
+        term_label, term_plural = "four", "fours"
     elif any(t in q for t in ["six", "sixes", "6"]):
-        term = "SIX"
-        term_label = "six"
-        term_plural = "sixes"
+        term_label, term_plural = "six", "sixes"
     else:
         return None
 
@@ -87,62 +137,13 @@ def _try_count_from_context(
     player = _normalize_player_name(player_raw)
     if not player:
         return None
-    player_re = re.escape(player)
-    player_display = " ".join(word.capitalize() for word in player.split())
-    used_indices: list[int] = []
-
-    # 1) Prefer explicit stats like: "Tilak Varma ... [4s-3 6s-3]"
-    try:
-        for i, chunk in enumerate(chunks):
-            text = chunk.get("text", "")
-            stats_match = re.search(
-                rf"{player_re}[^\r\n]{{0,120}}\[(?P<stats>[^\]]+)\]",
-                text,
-                flags=re.IGNORECASE,
-            )
-            if stats_match:
-                stats = stats_match.group("stats")
-                four_match = re.search(r"4s-(\d+)", stats, flags=re.IGNORECASE)
-                six_match = re.search(r"6s-(\d+)", stats, flags=re.IGNORECASE)
-                if term_label == "four" and four_match:
-                    used_indices.append(i)
-                    count = int(four_match.group(1))
-                    noun = term_label if count == 1 else term_plural
-                    return (f"{player_display} hit {count} {noun}.", used_indices)
-                if term_label == "six" and six_match:
-                    used_indices.append(i)
-                    count = int(six_match.group(1))
-                    noun = term_label if count == 1 else term_plural
-                    return (f"{player_display} hit {count} {noun}.", used_indices)
-    except re.error:
-        return None
-
-    # 2) Count scoring events from ball-by-ball lines
-    term_word = "SIX" if term_label == "six" else "FOUR"
-    count = 0
-    try:
-        for i, chunk in enumerate(chunks):
-            text = chunk.get("text", "")
-            # Split into ball-by-ball events like "8.5 6 Bowler to Batter, SIX"
-            events = re.split(r"(?=\b\d+\.\d+\s+)", text)
-            event_hits = 0
-            for event in events:
-                if re.search(rf"\bto\s+{player_re}\b", event, flags=re.IGNORECASE) and re.search(
-                    rf"\b{term_word}\b", event, flags=re.IGNORECASE
-                ):
-                    event_hits += 1
-            if event_hits > 0:
-                count += event_hits
-                used_indices.append(i)
-    except re.error:
-        return None
 
-    if count == 0:
-        return ("Not found in document.", used_indices)
+    result = table.count(player, term_label)
+    if result is None or result.count == 0:
+        return ("Not found in document.", result.chunk_indices if result else [])
 
-    noun = term_label if count == 1 else term_plural
-    answer = f"{player_display} hit {count} {noun}."
-    return (answer, used_indices)
+    noun = term_label if result.count == 1 else term_plural
+    return (f"{result.player} hit {result.count} {noun}.", result.chunk_indices)
 
 
 def _is_count_question(question: str) -> bool:
@@ -152,72 +153,400 @@ def _is_count_question(question: str) -> bool:
     return has_count and has_term
 
 
+_CITATION = re.compile(r"\s*\[C\d+\]", flags=re.IGNORECASE)
+# Whitespace and an unfinished "[C12" at the end of streamed text, which a
+# later delta may complete into a citation tag.
+_PARTIAL_CITATION = re.compile(r"\s*(?:\[(?:C\d*)?)?$", flags=re.IGNORECASE)
+
+
 def _strip_citations(text: str) -> str:
-    return re.sub(r"\s*\[C\\d+\\]", "", text, flags=re.IGNORECASE).strip()
+    return _CITATION.sub("", text).strip()
+
+
+class _CitationStripper:
+    """Incremental ``_strip_citations`` for streamed completions.
+
+    Text that could still turn out to be (or precede) a citation tag is held
+    back until the next delta decides it, so the concatenated output equals
+    ``_strip_citations`` of the full text.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+        self._started = False
 
+    def feed(self, delta: str) -> str:
+        text = _CITATION.sub("", self._pending + delta)
+        cut = _PARTIAL_CITATION.search(text).start()
+        self._pending = text[cut:]
+        return self._emit(text[:cut])
 
-def answer_question(session_id: str, question: str) -> dict[str, Any]:
+    def close(self) -> str:
+        text = _CITATION.sub("", self._pending).rstrip()
+        self._pending = ""
+        return self._emit(text)
+
+    def _emit(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
+
+@dataclass
+class _Draft:
+    """Everything known about a response before the chat completion runs.
+
+    ``messages`` is None when ``result`` is already final (count answers and
+    cache hits); otherwise the completion's text goes into ``result[field]``.
+    """
+
+    result: dict[str, Any]
+    field: str
+    messages: list[dict[str, str]] | None = None
+    on_done: Callable[[dict[str, Any]], None] | None = None
+
+
+def _chat_messages(system: str, prompt: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _check_api_key() -> None:
     if not settings.OPENAI_API_KEY:
         raise ValueError("OPENAI_API_KEY is not set.")
 
-    if _is_count_question(question):
-        all_chunks = get_chunks(session_id, limit=None)
-        count_result = _try_count_from_context(question, all_chunks)
-        if count_result is not None:
-            answer, used_indices = count_result
-            used_chunks = [all_chunks[i] for i in used_indices] if used_indices else []
-            context_block, citations, retrieval_context = _build_context(used_chunks)
-            return {
-                "answer": answer,
-                "citations": citations,
-                "retrieval_context": retrieval_context,
-            }
-
-    embed_resp = _client.embeddings.create(
-        model=settings.OPENAI_EMBED_MODEL,
-        input=[question],
+
+def _draft_count_answer(session_id: str, question: str) -> _Draft | None:
+    """Answer count questions from the event table, without embedding the question."""
+    table = get_artifact(session_id, "events") if _is_count_question(question) else None
+    if table is None:
+        return None
+    count_result = _count_from_events(question, table)
+    if count_result is None:
+        return None
+    answer, used_indices = count_result
+    used_chunks = get_chunks_by_index(session_id, used_indices)
+    context_block, citations, retrieval_context = _build_context(used_chunks)
+    return _Draft(
+        {
+            "answer": answer,
+            "citations": citations,
+            "retrieval_context": retrieval_context,
+        },
+        "answer",
     )
-    query_embedding = embed_resp.data[0].embedding
 
-    results = query(session_id, query_embedding, settings.TOP_K)
+
+def _answer_draft(
+    session_id: str, version: str, question: str, query_embedding: list[float], results: list[dict[str, Any]]
+) -> _Draft:
     context_block, citations, retrieval_context = _build_context(results)
 
     prompt = build_answer_prompt(context_block, question)
-    response = _client.chat.completions.create(
-        model=settings.OPENAI_MODEL,
-        temperature=0.2,
-        messages=[
-            {"role": "system", "content": "You are a precise RAG assistant."},
-            {"role": "user", "content": prompt},
-        ],
+    return _Draft(
+        {
+            "answer": "",
+            "citations": citations,
+            "retrieval_context": retrieval_context,
+        },
+        "answer",
+        messages=_chat_messages("You are a precise RAG assistant.", prompt),
+        on_done=lambda result: _answers.put(session_id, version, question, query_embedding, result),
     )
 
-    answer = _strip_citations(response.choices[0].message.content.strip())
 
-    return {
-        "answer": answer,
-        "citations": citations,
-        "retrieval_context": retrieval_context,
-    }
+def _draft_answers(session_id: str, questions: list[str], query_embeddings: list[list[float]]) -> list[_Draft]:
+    """Drafts for ``questions``: cached answers where possible, one batched retrieval for the rest."""
+    version = index_version(session_id)
+    drafts: list[_Draft | None] = []
+    pending: list[int] = []
+    for i, (question, query_embedding) in enumerate(zip(questions, query_embeddings)):
+        cached = _answers.get(session_id, version, question, query_embedding)
+        drafts.append(_Draft(cached, "answer") if cached is not None else None)
+        if cached is None:
+            pending.append(i)
+    if pending:
+        retrieved = retrieve_many(
+            session_id, [questions[i] for i in pending], [query_embeddings[i] for i in pending], settings.TOP_K
+        )
+        for i, results in zip(pending, retrieved):
+            drafts[i] = _answer_draft(session_id, version, questions[i], query_embeddings[i], results)
+    return drafts
 
 
-def summarise(session_id: str) -> dict[str, Any]:
-    if not settings.OPENAI_API_KEY:
-        raise ValueError("OPENAI_API_KEY is not set.")
+def _draft_answer(session_id: str, question: str, query_embedding: list[float]) -> _Draft:
+    return _draft_answers(session_id, [question], [query_embedding])[0]
+
+
+async def _aprepare_answer(session_id: str, question: str) -> _Draft:
+    _check_api_key()
+    draft = _draft_count_answer(session_id, question)
+    if draft is None:
+        query_embedding = await aembed_query(question)
+        # Vector and lexical search are CPU-bound; keep them off the event loop.
+        draft = await asyncio.to_thread(_draft_answer, session_id, question, query_embedding)
+    return draft
+
 
-    chunks = get_chunks(session_id, limit=settings.MAX_CHUNKS_FOR_SUMMARY)
-    context_block, citations, _ = _build_context(chunks)
+async def _aprepare_answers(session_id: str, questions: list[str]) -> list[_Draft]:
+    """``_aprepare_answer`` for many questions: one embeddings request and one batched retrieval."""
+    _check_api_key()
+    drafts = [_draft_count_answer(session_id, question) for question in questions]
+    pending = [i for i, draft in enumerate(drafts) if draft is None]
+    if pending:
+        questions = [questions[i] for i in pending]
+        query_embeddings = await aembed_queries(questions)
+        retrieved = await asyncio.to_thread(_draft_answers, session_id, questions, query_embeddings)
+        for i, draft in zip(pending, retrieved):
+            drafts[i] = draft
+    return drafts
 
+
+def _summary_draft(session_id: str, context_block: str, citations: list[dict[str, Any]]) -> _Draft:
     prompt = build_summary_prompt(context_block)
+    return _Draft(
+        {"summary": "", "citations": citations},
+        "summary",
+        messages=_chat_messages("You summarize documents faithfully.", prompt),
+        on_done=lambda result: _summaries.put(session_id, result),
+    )
+
+
+def _draft_summary_from_notes(session_id: str, notes: list[Note]) -> _Draft:
+    """Final summary prompt over map-reduce notes, citing the chunks the notes came from."""
+    sources = get_chunks_by_index(session_id, sorted(source_indices(notes)))
+    context_block, cited = cite_notes(notes, {chunk["metadata"]["chunk_index"] for chunk in sources})
+    by_index = {chunk["metadata"]["chunk_index"]: chunk for chunk in sources}
+    citations = [
+        _citation(f"C{n + 1}", by_index[chunk_index], by_index[chunk_index].get("text", ""))
+        for n, chunk_index in enumerate(cited)
+    ]
+    return _summary_draft(session_id, context_block, citations)
+
+
+def _draft_summary(session_id: str) -> _Draft:
+    """Summarize short documents in one prompt and longer ones by map-reduce.
+
+    Documents of at most ``MAX_CHUNKS_FOR_SUMMARY`` chunks go straight into
+    the summary prompt. Longer ones are first condensed into notes by
+    ``summarize.map_reduce``, which covers every chunk.
+    """
+    chunks = get_chunks(session_id)
+    if len(chunks) <= settings.MAX_CHUNKS_FOR_SUMMARY:
+        context_block, citations, _ = _build_context(chunks)
+        return _summary_draft(session_id, context_block, citations)
+    return _draft_summary_from_notes(session_id, map_reduce(chunks, _note))
+
+
+async def _adraft_summary(session_id: str) -> _Draft:
+    chunks = await asyncio.to_thread(get_chunks, session_id)
+    if len(chunks) <= settings.MAX_CHUNKS_FOR_SUMMARY:
+        context_block, citations, _ = await asyncio.to_thread(_build_context, chunks)
+        return _summary_draft(session_id, context_block, citations)
+    notes = await amap_reduce(chunks, _anote)
+    return await asyncio.to_thread(_draft_summary_from_notes, session_id, notes)
+
+
+async def _aprepare_summary(session_id: str) -> _Draft:
+    _check_api_key()
+    cached = _summaries.get(session_id)
+    if cached is not None:
+        return _Draft(cached, "summary")
+    # Joining a running precompute yields its finished summary rather than a prompt.
+    return await _summary_draft_flight.ado(session_id, lambda: _adraft_summary(session_id))
+
+
+def _precompute_summary(session_id: str) -> None:
+    # Whether this call got as far as the flight, and whether it ran the draft there.
+    reached = led = False
+
+    def compute() -> _Draft:
+        nonlocal led
+        led = True
+        return _Draft(_complete(_draft_summary(session_id)), "summary")
+
+    try:
+        if _summaries.contains(session_id):
+            return
+        reached = True
+        # If a request is already drafting the summary, it completes and caches it instead.
+        _summary_draft_flight.do(session_id, compute)
+    except Exception:
+        # Best effort: the session may have been evicted, and /summary reports real errors.
+        _summaries.record_precompute(ok=False, joined=reached and not led)
+    else:
+        _summaries.record_precompute(ok=True, joined=not led)
+
+
+def _finish(draft: _Draft, text: str) -> dict[str, Any]:
+    draft.result[draft.field] = text
+    if draft.on_done is not None:
+        draft.on_done(draft.result)
+    return draft.result
+
+
+def _completion_args(draft: _Draft) -> dict[str, Any]:
+    return {"model": settings.OPENAI_MODEL, "temperature": 0.2, "messages": draft.messages}
+
+
+def _complete(draft: _Draft) -> dict[str, Any]:
+    if draft.messages is None:
+        return draft.result
+    response = _client.chat.completions.create(**_completion_args(draft))
+    return _finish(draft, _strip_citations(response.choices[0].message.content.strip()))
+
+
+async def _acomplete(draft: _Draft) -> dict[str, Any]:
+    if draft.messages is None:
+        return draft.result
+    response = await async_client().chat.completions.create(**_completion_args(draft))
+    return _finish(draft, _strip_citations(response.choices[0].message.content.strip()))
+
+
+def _note(messages: list[dict[str, str]]) -> str:
     response = _client.chat.completions.create(
         model=settings.OPENAI_MODEL,
         temperature=0.2,
-        messages=[
-            {"role": "system", "content": "You summarize documents faithfully."},
-            {"role": "user", "content": prompt},
-        ],
+        messages=messages,
+        max_tokens=settings.SUMMARY_NOTE_MAX_TOKENS,
+    )
+    return response.choices[0].message.content.strip()
+
+
+async def _anote(messages: list[dict[str, str]]) -> str:
+    response = await async_client().chat.completions.create(
+        model=settings.OPENAI_MODEL,
+        temperature=0.2,
+        messages=messages,
+        max_tokens=settings.SUMMARY_NOTE_MAX_TOKENS,
     )
+    return response.choices[0].message.content.strip()
+
+
+def _delta(chunk: Any) -> str | None:
+    return chunk.choices[0].delta.content if chunk.choices else None
+
+
+async def _astream(draft: _Draft) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Yield ``(event, data)``: citations first, then text deltas, then the full text."""
+    yield "citations", {key: value for key, value in draft.result.items() if key != draft.field}
+
+    if draft.messages is None:
+        text = draft.result[draft.field]
+        if text:
+            yield "token", {"text": text}
+        yield "done", {draft.field: text}
+        return
+
+    stripper = _CitationStripper()
+    parts: list[str] = []
+    stream = await async_client().chat.completions.create(**_completion_args(draft), stream=True)
+    async for chunk in stream:
+        delta = _delta(chunk)
+        text = stripper.feed(delta) if delta else ""
+        if text:
+            parts.append(text)
+            yield "token", {"text": text}
+    text = stripper.close()
+    if text:
+        parts.append(text)
+        yield "token", {"text": text}
+    yield "done", {draft.field: _finish(draft, "".join(parts))[draft.field]}
+
+
+def _question_key(session_id: str, question: str) -> tuple[str, str]:
+    return session_id, " ".join(question.split()).casefold()
 
-    summary = _strip_citations(response.choices[0].message.content.strip())
 
-    return {"summary": summary, "citations": citations}
+async def answer_question_async(session_id: str, question: str) -> dict[str, Any]:
+    """Answer ``question`` on the shared async client; no thread is held while waiting.
+
+    Identical concurrent questions on a session share one computation.
+    """
+
+    async def compute() -> dict[str, Any]:
+        return await _acomplete(await _aprepare_answer(session_id, question))
+
+    return await _ask_flight.ado(_question_key(session_id, question), compute)
+
+
+async def stream_answer_async(session_id: str, question: str) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Retrieve now, raising the same errors as ``answer_question_async``; stream the answer lazily.
+
+    Identical questions streamed concurrently on a session share one
+    retrieval and one completion; later callers replay it from the start.
+    """
+
+    async def start() -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        return _astream(await _aprepare_answer(session_id, question))
+
+    return await _ask_flight.astream(_question_key(session_id, question), start)
+
+
+async def answer_questions_async(session_id: str, questions: list[str]) -> list[dict[str, Any]]:
+    """Answer ``questions`` about one session, results in the same order.
+
+    Questions are embedded in one request and retrieved with one batched
+    vector query; the chat completions then run concurrently, at most
+    ``ASK_BATCH_MAX_CONCURRENCY`` at a time. A completion that fails yields
+    ``{"error": ...}`` in its slot instead of failing the batch; errors
+    before that point (unknown session, embedding failure) are raised.
+    """
+    drafts = await _aprepare_answers(session_id, questions)
+    semaphore = asyncio.Semaphore(max(1, settings.ASK_BATCH_MAX_CONCURRENCY))
+
+    async def complete(draft: _Draft) -> dict[str, Any]:
+        async with semaphore:
+            try:
+                return await _acomplete(draft)
+            except Exception as exc:
+                return {"error": f"Ask failed: {exc}"}
+
+    return list(await asyncio.gather(*(complete(draft) for draft in drafts)))
+
+
+async def summarise_async(session_id: str) -> dict[str, Any]:
+    """Summarize the document; concurrent calls for a session share one."""
+
+    async def compute() -> dict[str, Any]:
+        return await _acomplete(await _aprepare_summary(session_id))
+
+    return await _summary_flight.ado(session_id, compute)
+
+
+async def stream_summary_async(session_id: str) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Select the context now, raising the same errors as ``summarise_async``; stream the summary lazily.
+
+    Concurrent streams share the context (and map-reduce) with each other, with
+    ``/summary`` and with the precompute; each streams its own final completion.
+    """
+    return _astream(await _aprepare_summary(session_id))
+
+
+def precompute_summary(session_id: str) -> None:
+    """Generate and cache the summary in the background, if ``SUMMARY_PRECOMPUTE`` is on."""
+    if settings.SUMMARY_PRECOMPUTE and settings.OPENAI_API_KEY:
+        _precompute.submit(_precompute_summary, session_id)
+
+
+def answer_cache_stats() -> dict:
+    return _answers.stats()
+
+
+def context_packing_stats() -> dict:
+    return _packing.stats()
+
+
+def summary_cache_stats() -> dict:
+    return _summaries.stats()
+
+
+def coalescing_stats() -> dict:
+    return {
+        "ask": _ask_flight.stats(),
+        "summary": _summary_flight.stats(),
+        "summary_draft": _summary_draft_flight.stats(),
+    }
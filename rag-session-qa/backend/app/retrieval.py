@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from .config import settings
+from .vectorstore import query_many
+
+# Length of the prefix of a chunk that is searched for in its predecessor.
+_PROBE_CHARS = 48
+
+
+def _relevance(results: list[dict[str, Any]]) -> list[float]:
+    """Query relevance in [0, 1] for each result, whatever retriever produced it."""
+    if results and all("fusion_score" in item for item in results):
+        best = max(item["fusion_score"] for item in results) or 1.0
+        return [item["fusion_score"] / best for item in results]
+    return [1.0 - item["score"] if item.get("score") is not None else 0.0 for item in results]
+
+
+def mmr(results: list[dict[str, Any]], top_k: int, lambda_: float) -> list[dict[str, Any]]:
+    """Pick ``top_k`` results by maximal marginal relevance.
+
+    Each step takes the candidate maximising
+    ``lambda * relevance - (1 - lambda) * max similarity to those already picked``.
+    Candidates without an embedding are only penalised through relevance.
+    """
+    if len(results) <= top_k or lambda_ >= 1.0:
+        return results[:top_k]
+    relevance = np.asarray(_relevance(results), dtype=np.float32)
+    dim = next((len(item["embedding"]) for item in results if item.get("embedding")), 0)
+    vectors = np.zeros((len(results), dim), dtype=np.float32)
+    for i, item in enumerate(results):
+        if item.get("embedding"):
+            vectors[i] = item["embedding"]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+    similarity = vectors @ vectors.T
+
+    selected: list[int] = []
+    redundancy = np.zeros(len(results), dtype=np.float32)
+    available = np.ones(len(results), dtype=bool)
+    for _ in range(top_k):
+        scores = lambda_ * relevance - (1.0 - lambda_) * redundancy
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+        redundancy = np.maximum(redundancy, similarity[pick])
+    return [results[i] for i in selected]
+
+
+def _join_overlapping(head: str, tail: str) -> str:
+    """Concatenate two consecutive chunks, keeping their shared text once."""
+    probe = tail[:_PROBE_CHARS]
+    if probe:
+        start = max(0, len(head) - len(tail))
+        found = head.find(probe, start)
+        while found >= 0:
+            if tail.startswith(head[found:]):
+                return head[:found] + tail
+            found = head.find(probe, found + 1)
+    return f"{head} {tail}"
+
+
+def merge_adjacent(results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Merge results whose ``chunk_index`` values are consecutive into one passage.
+
+    Overlapping text between neighbours is kept once. Merged passages keep the
+    first chunk's id and metadata, list every merged index in
+    ``metadata["chunk_indices"]``, and take the position of their best-ranked
+    member.
+    """
+    def chunk_index(item: dict[str, Any]) -> int | None:
+        value = item.get("metadata", {}).get("chunk_index")
+        return value if isinstance(value, int) else None
+
+    by_index = {chunk_index(item): rank for rank, item in enumerate(results) if chunk_index(item) is not None}
+    if len(by_index) < 2:
+        return results
+
+    merged: list[tuple[int, dict[str, Any]]] = []
+    for start in sorted(by_index):
+        if start - 1 in by_index:
+            continue
+        run = [start]
+        while run[-1] + 1 in by_index:
+            run.append(run[-1] + 1)
+        ranks = [by_index[i] for i in run]
+        first = results[ranks[0]]
+        if len(run) == 1:
+            merged.append((ranks[0], first))
+            continue
+        text = first.get("text", "")
+        for rank in ranks[1:]:
+            text = _join_overlapping(text, results[rank].get("text", ""))
+        scores = [results[rank].get("score") for rank in ranks if results[rank].get("score") is not None]
+        merged.append(
+            (
+                min(ranks),
+                {
+                    **first,
+                    "text": text,
+                    "metadata": {**first.get("metadata", {}), "chunk_indices": run},
+                    "score": min(scores) if scores else None,
+                },
+            )
+        )
+    merged.extend((rank, item) for rank, item in enumerate(results) if chunk_index(item) is None)
+    merged.sort(key=lambda pair: pair[0])
+    return [item for _, item in merged]
+
+
+def retrieve_many(
+    session_id: str, questions: list[str], query_embeddings: list[list[float]], top_k: int
+) -> list[list[dict[str, Any]]]:
+    """Retrieve context for ``questions``: search, diversify with MMR, then merge neighbours.
+
+    ``MMR_CANDIDATES`` results are fetched and ``top_k`` of them chosen with
+    ``MMR_LAMBDA`` (1.0 keeps plain relevance order and skips fetching
+    embeddings). Adjacent chunks among the chosen ones are then merged, so
+    the overlap between them reaches the prompt once. The dense search for
+    all questions is one batched store query.
+    """
+    use_mmr = settings.MMR_LAMBDA < 1.0 and settings.MMR_CANDIDATES > top_k
+    pool = settings.MMR_CANDIDATES if use_mmr else top_k
+    batches = query_many(session_id, query_embeddings, pool, query_texts=questions, include_embeddings=use_mmr)
+    retrieved = []
+    for results in batches:
+        if use_mmr:
+            results = mmr(results, top_k, settings.MMR_LAMBDA)
+        for item in results:
+            item.pop("embedding", None)
+        if settings.MERGE_ADJACENT_CHUNKS:
+            results = merge_adjacent(results)
+        retrieved.append(results)
+    return retrieved
@@ -6,8 +6,17 @@ from pydantic import BaseModel
 
 class UploadResponse(BaseModel):
     session_id: str
+    status: str
     message: str
-    num_chunks: int
+    num_chunks: int | None = None
+
+
+class SessionStatusResponse(BaseModel):
+    session_id: str
+    status: str
+    chunks_embedded: int
+    chunks_total: int | None = None
+    error: str | None = None
 
 
 class AskRequest(BaseModel):
@@ -28,6 +37,22 @@ class AskResponse(BaseModel):
     retrieval_context: list[str]
 
 
+class AskBatchRequest(BaseModel):
+    session_id: str
+    questions: list[str]
+
+
+class AskBatchItem(BaseModel):
+    answer: str | None = None
+    citations: list[Citation] = []
+    retrieval_context: list[str] = []
+    error: str | None = None
+
+
+class AskBatchResponse(BaseModel):
+    results: list[AskBatchItem]
+
+
 class SummaryRequest(BaseModel):
     session_id: str
 
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable
+
+
+class _Broadcast:
+    """The items of one async stream, replayed from the start to every caller that joins it."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        # Resolved once the stream has started, or with the error that stopped it starting.
+        self.started: asyncio.Future = loop.create_future()
+        self.items: list[Any] = []
+        self.error: BaseException | None = None
+        self.finished = False
+        self._changed = asyncio.Event()
+
+    async def pump(self, fn: Callable[[], Awaitable[AsyncIterator[Any]]]) -> None:
+        try:
+            stream = await fn()
+        except BaseException as exc:
+            self.started.set_exception(exc)
+            self._finish()
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return
+        self.started.set_result(None)
+        try:
+            async for item in stream:
+                self.items.append(item)
+                self._notify()
+        except BaseException as exc:
+            self.error = exc
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+        finally:
+            self._finish()
+
+    async def replay(self, copies: bool) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            if position < len(self.items):
+                item = self.items[position]
+                position += 1
+                yield copy.deepcopy(item) if copies else item
+            elif self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+    def _finish(self) -> None:
+        self.finished = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one computation.
+
+    The first caller for a key runs it; callers that arrive while it is in
+    flight wait for its outcome and get a copy of its result (or its
+    exception). Nothing is kept once the call finishes, so this is not a
+    cache. Sync and async callers share the same in-flight calls, so a
+    request can join work started on a worker thread and vice versa.
+    Cancelling an async caller, leader or not, only stops its own wait.
+    Streams (``astream``) are coalesced separately, among async callers.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+        self._streams: dict[Hashable, _Broadcast] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        future, leader = self._join(key)
+        if not leader:
+            return copy.deepcopy(future.result())
+        try:
+            result = fn()
+        except BaseException as exc:
+            self._settle(key, future, exc=exc)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future, leader = self._join(key)
+        if not leader:
+            # Shielded so that a waiter going away does not cancel the shared call.
+            return copy.deepcopy(await asyncio.shield(asyncio.wrap_future(future)))
+        # The call runs as its own task, so cancelling the leader (a client
+        # going away) stops only the leader's wait, not the waiters' result.
+        task = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda done: self._settle_task(key, future, done))
+        return await asyncio.shield(task)
+
+    async def astream(self, key: Hashable, fn: Callable[[], Awaitable[AsyncIterator[Any]]]) -> AsyncIterator[Any]:
+        """Coalesce async streams: callers that arrive while one is in flight share its items.
+
+        ``fn`` starts the stream and may raise, which is raised here to every
+        caller. The stream then runs once, as a task of its own, and each
+        caller iterates over all of its items from the start (waiters get
+        copies); an error mid-stream is raised by every caller's iterator.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            broadcast = self._streams.get(key)
+            # A stream can only be shared on the loop that produces it.
+            leader = broadcast is None or broadcast.loop is not loop
+            if leader:
+                broadcast = _Broadcast(loop)
+                self._streams[key] = broadcast
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+        if leader:
+            task = asyncio.ensure_future(broadcast.pump(fn))
+            task.add_done_callback(lambda _: self._release_stream(key, broadcast))
+        await asyncio.shield(broadcast.started)
+        return broadcast.replay(copies=not leader)
+
+    def stats(self) -> dict[str, float | int]:
+        with self._lock:
+            calls = self._leaders + self._coalesced
+            return {
+                "calls": self._leaders,
+                "coalesced": self._coalesced,
+                "coalesced_rate": round(self._coalesced / calls, 4) if calls else 0.0,
+                "in_flight": len(self._calls) + len(self._streams),
+            }
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._leaders += 1
+            return future, True
+
+    def _release_stream(self, key: Hashable, broadcast: _Broadcast) -> None:
+        with self._lock:
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+
+    def _settle_task(self, key: Hashable, future: Future, task: asyncio.Future) -> None:
+        if task.cancelled():
+            self._settle(key, future, exc=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._settle(key, future, exc=task.exception())
+        else:
+            self._settle(key, future, result=task.result())
+
+    def _settle(self, key: Hashable, future: Future, result: Any = None, exc: BaseException | None = None) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            # Waiters get their own copy; the leader keeps the original.
+            future.set_result(copy.deepcopy(result))
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class VectorStore(ABC):
+    """Storage and similarity search for named indexes of embedded chunks.
+
+    ``vectorstore.py`` maps sessions onto index names and owns budgeting and
+    expiry; a store only has to keep each index's rows and search them. Every
+    implementation must return the same shapes:
+
+    - ``query_many`` returns, for each query vector, up to ``top_k`` dicts
+      with ``chunk_id``, ``text``, ``metadata`` and ``score`` (cosine
+      distance), nearest first; ``query`` is the single-vector form.
+    - ``get`` returns every row as a dict with ``chunk_id``, ``text`` and
+      ``metadata``, in no particular order.
+    - ``get_embeddings`` maps the requested ids to their vectors, which may
+      have been normalised to unit length; unknown ids are left out.
+    """
+
+    @abstractmethod
+    def create(self, name: str) -> None:
+        """Create an empty index called ``name``."""
+
+    @abstractmethod
+    def delete(self, name: str) -> None:
+        """Drop the index; a missing index is not an error."""
+
+    @abstractmethod
+    def upsert(
+        self,
+        name: str,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+        embeddings: list[list[float]],
+    ) -> None:
+        """Add rows to an existing index."""
+
+    @abstractmethod
+    def query_many(
+        self, name: str, query_embeddings: list[list[float]], top_k: int
+    ) -> list[list[dict[str, Any]]]:
+        """Return the ``top_k`` rows nearest to each of ``query_embeddings``, in one pass."""
+
+    def query(self, name: str, query_embedding: list[float], top_k: int) -> list[dict[str, Any]]:
+        """Return the ``top_k`` rows nearest to ``query_embedding``."""
+        return self.query_many(name, [query_embedding], top_k)[0]
+
+    @abstractmethod
+    def get(self, name: str) -> list[dict[str, Any]]:
+        """Return every row of the index."""
+
+    @abstractmethod
+    def get_embeddings(self, name: str, ids: list[str]) -> dict[str, list[float]]:
+        """Return the stored vectors for ``ids``."""
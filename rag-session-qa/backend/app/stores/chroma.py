@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import os
+import shutil
+from typing import Any
+
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+
+from ..utils.processes import pid_alive
+from .base import VectorStore
+
+
+class ChromaStore(VectorStore):
+    """Each index is an in-memory Chroma collection searched with HNSW."""
+
+    def __init__(self) -> None:
+        self._client = self._make_client()
+        self._collections: dict[str, Any] = {}
+
+    def _make_client(self) -> Any:
+        return chromadb.Client(
+            ChromaSettings(allow_reset=True, anonymized_telemetry=False)
+        )
+
+    def create(self, name: str) -> None:
+        self._collections[name] = self._client.create_collection(
+            name, metadata={"hnsw:space": "cosine"}
+        )
+
+    def delete(self, name: str) -> None:
+        self._collections.pop(name, None)
+        try:
+            self._client.delete_collection(name)
+        except Exception:
+            pass
+
+    def upsert(
+        self,
+        name: str,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+        embeddings: list[list[float]],
+    ) -> None:
+        self._collections[name].add(
+            ids=ids,
+            documents=documents,
+            metadatas=metadatas,
+            embeddings=embeddings,
+        )
+
+    def query_many(
+        self, name: str, query_embeddings: list[list[float]], top_k: int
+    ) -> list[list[dict[str, Any]]]:
+        if not query_embeddings:
+            return []
+        results = self._collections[name].query(
+            query_embeddings=query_embeddings,
+            n_results=top_k,
+            include=["documents", "metadatas", "distances"],
+        )
+        formatted = []
+        for ids, docs, metas, dists in zip(
+            results.get("ids", []),
+            results.get("documents", []),
+            results.get("metadatas", []),
+            results.get("distances", []),
+        ):
+            formatted.append(
+                [
+                    {
+                        "chunk_id": ids[i],
+                        "text": doc,
+                        "metadata": metas[i],
+                        "score": dists[i],
+                    }
+                    for i, doc in enumerate(docs)
+                ]
+            )
+        return formatted
+
+    def get(self, name: str) -> list[dict[str, Any]]:
+        results = self._collections[name].get(include=["documents", "metadatas"])
+        docs = results.get("documents", [])
+        metas = results.get("metadatas", [])
+        ids = results.get("ids", [])
+        return [
+            {"chunk_id": ids[i], "text": doc, "metadata": metas[i]}
+            for i, doc in enumerate(docs)
+        ]
+
+    def get_embeddings(self, name: str, ids: list[str]) -> dict[str, list[float]]:
+        if not ids:
+            return {}
+        results = self._collections[name].get(ids=ids, include=["embeddings"])
+        vectors = results.get("embeddings")
+        if vectors is None:
+            return {}
+        return {chunk_id: [float(x) for x in vector] for chunk_id, vector in zip(results.get("ids", []), vectors)}
+
+
+class PersistentChromaStore(ChromaStore):
+    """Chroma collections stored on disk under ``path`` instead of in RAM.
+
+    Each server process gets its own ``path/<pid>`` directory, so workers
+    sharing ``path`` never touch each other's collections. Sessions live in
+    process memory, so a directory whose process is gone can never be reached
+    again and is removed on start, as are collections with ``prefix`` left in
+    this process's directory by an earlier process with the same pid.
+    """
+
+    def __init__(self, path: str, prefix: str = "") -> None:
+        self.root = path
+        self.path = os.path.join(path, str(os.getpid()))
+        self._remove_stale_dirs()
+        super().__init__()
+        if prefix:
+            for collection in self._client.list_collections():
+                name = getattr(collection, "name", collection)
+                if name.startswith(prefix):
+                    self.delete(name)
+
+    def _remove_stale_dirs(self) -> None:
+        if not os.path.isdir(self.root):
+            return
+        for entry in os.listdir(self.root):
+            if entry.isdigit() and int(entry) != os.getpid() and not pid_alive(int(entry)):
+                shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
+
+    def _make_client(self) -> Any:
+        os.makedirs(self.path, exist_ok=True)
+        return chromadb.PersistentClient(
+            path=self.path,
+            settings=ChromaSettings(allow_reset=True, anonymized_telemetry=False),
+        )
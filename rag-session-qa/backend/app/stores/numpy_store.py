@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+import numpy as np
+
+from .base import VectorStore
+
+
+class _Matrix:
+    """Rows of unit-normalised float32 embeddings plus their documents."""
+
+    def __init__(self) -> None:
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.size = 0
+        self.ids: list[str] = []
+        self.positions: dict[str, int] = {}
+        self.documents: list[str] = []
+        self.metadatas: list[dict[str, Any]] = []
+
+
+class NumpyStore(VectorStore):
+    """Exact cosine search over a contiguous matrix per index.
+
+    For the few thousand chunks a session usually holds, one matrix-vector
+    product plus ``argpartition`` beats HNSW and Chroma's per-call overhead.
+    """
+
+    def __init__(self) -> None:
+        self._matrices: dict[str, _Matrix] = {}
+        self._lock = threading.Lock()
+
+    def create(self, name: str) -> None:
+        with self._lock:
+            self._matrices[name] = _Matrix()
+
+    def delete(self, name: str) -> None:
+        with self._lock:
+            self._matrices.pop(name, None)
+
+    def upsert(
+        self,
+        name: str,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+        embeddings: list[list[float]],
+    ) -> None:
+        rows = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        rows /= np.where(norms == 0, 1, norms)
+        with self._lock:
+            matrix = self._matrices[name]
+            needed = matrix.size + len(rows)
+            if matrix.vectors.shape[0] < needed:
+                # Grow geometrically so streaming upserts stay amortised O(n).
+                grown = np.empty((max(needed, 2 * matrix.vectors.shape[0]), rows.shape[1]), dtype=np.float32)
+                if matrix.size:
+                    grown[: matrix.size] = matrix.vectors[: matrix.size]
+                matrix.vectors = grown
+            matrix.vectors[matrix.size : needed] = rows
+            matrix.positions.update((chunk_id, matrix.size + i) for i, chunk_id in enumerate(ids))
+            matrix.ids.extend(ids)
+            matrix.documents.extend(documents)
+            matrix.metadatas.extend(metadatas)
+            matrix.size = needed
+
+    def query_many(
+        self, name: str, query_embeddings: list[list[float]], top_k: int
+    ) -> list[list[dict[str, Any]]]:
+        with self._lock:
+            matrix = self._matrices[name]
+            vectors, size = matrix.vectors, matrix.size
+        if size == 0 or top_k <= 0 or not query_embeddings:
+            return [[] for _ in query_embeddings]
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries /= np.where(norms == 0, 1, norms)
+        # One matrix-matrix product for the whole batch.
+        all_scores = queries @ vectors[:size].T
+        k = min(top_k, size)
+        results = []
+        for scores in all_scores:
+            if k < size:
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+            else:
+                top = np.argsort(-scores)
+            # Report cosine distance, like Chroma's "hnsw:space": "cosine".
+            results.append(
+                [
+                    {
+                        "chunk_id": matrix.ids[i],
+                        "text": matrix.documents[i],
+                        "metadata": matrix.metadatas[i],
+                        "score": float(1.0 - scores[i]),
+                    }
+                    for i in top.tolist()
+                ]
+            )
+        return results
+
+    def get(self, name: str) -> list[dict[str, Any]]:
+        with self._lock:
+            matrix = self._matrices[name]
+            size = matrix.size
+        return [
+            {"chunk_id": matrix.ids[i], "text": matrix.documents[i], "metadata": matrix.metadatas[i]}
+            for i in range(size)
+        ]
+
+    def get_embeddings(self, name: str, ids: list[str]) -> dict[str, list[float]]:
+        with self._lock:
+            matrix = self._matrices[name]
+            vectors, positions = matrix.vectors, matrix.positions
+        return {chunk_id: vectors[positions[chunk_id]].tolist() for chunk_id in ids if chunk_id in positions}
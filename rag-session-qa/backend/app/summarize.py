@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from .config import settings
+from .utils.context import truncate_at_sentence
+from .utils.prompts import build_map_prompt, build_reduce_prompt
+from .utils.tokens import count_tokens
+
+# Map and reduce notes cite the chunks they came from as "[#12]"; a model may
+# also merge tags into "[#12, #13]".
+_SOURCE_TAG = re.compile(r"\[\s*#\d+(?:\s*,\s*#\d+)*\s*\]")
+_SOURCE_INDEX = re.compile(r"#(\d+)")
+
+# Maps a list of chat messages to the completion text.
+Complete = Callable[[list[dict[str, str]]], str]
+AsyncComplete = Callable[[list[dict[str, str]]], Awaitable[str]]
+
+_SYSTEM = "You summarize documents faithfully."
+
+# Shared by every summary, so SUMMARY_MAX_CONCURRENCY caps calls process-wide.
+_pool = ThreadPoolExecutor(
+    max_workers=max(1, settings.SUMMARY_MAX_CONCURRENCY), thread_name_prefix="summary"
+)
+
+_semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+_semaphores_lock = threading.Lock()
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        semaphore = _semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, settings.SUMMARY_MAX_CONCURRENCY))
+            _semaphores[loop] = semaphore
+        return semaphore
+
+
+def _messages(prompt: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": _SYSTEM},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _reduce_budget() -> int:
+    # The last level feeds the final summary prompt, so it must fit the context budget.
+    return settings.CONTEXT_TOKEN_BUDGET if settings.CONTEXT_TOKEN_BUDGET > 0 else settings.SUMMARY_MAP_TOKENS
+
+
+@dataclass(frozen=True)
+class Note:
+    """A map or reduce note and the chunk indices it was written from."""
+
+    text: str
+    sources: frozenset[int]
+
+
+# A prompt and the notes (or, for the map step, tagged chunk groups) it covers.
+_Call = tuple[str, list[Note]]
+
+
+def _map_prompts(chunks: list[dict[str, Any]]) -> list[_Call]:
+    """One prompt per run of consecutive chunks that fits ``SUMMARY_MAP_TOKENS``.
+
+    A chunk that is larger than the budget on its own is cut at a sentence
+    boundary rather than skipped.
+    """
+    model = settings.OPENAI_MODEL
+    budget = max(1, settings.SUMMARY_MAP_TOKENS)
+    calls: list[_Call] = []
+    group: list[str] = []
+    indices: set[int] = set()
+    used = 0
+    for chunk in chunks:
+        text = chunk.get("text", "")
+        chunk_index = chunk["metadata"].get("chunk_index", 0)
+        block = f"[#{chunk_index}]\n{text}"
+        tokens = count_tokens(block, model)
+        if tokens > budget:
+            block = block[: len(block) - len(text)] + truncate_at_sentence(text, budget, model)
+            tokens = budget
+        if group and used + tokens > budget:
+            calls.append(_map_call(group, indices))
+            group, indices, used = [], set(), 0
+        group.append(block)
+        indices.add(chunk_index)
+        used += tokens
+    if group:
+        calls.append(_map_call(group, indices))
+    return calls
+
+
+def _map_call(blocks: list[str], indices: set[int]) -> _Call:
+    context_block = "\n\n".join(blocks)
+    return build_map_prompt(context_block), [Note(context_block, frozenset(indices))]
+
+
+def _fits(notes: list[Note], budget: int) -> bool:
+    return sum(count_tokens(note.text, settings.OPENAI_MODEL) + 1 for note in notes) <= budget
+
+
+def _reduce_prompts(notes: list[Note], budget: int) -> list[_Call]:
+    """Group consecutive notes into prompts of at most ``budget`` tokens.
+
+    Every group takes at least two notes, so each level at least halves the
+    number of notes and the depth of the reduction is logarithmic.
+    """
+    model = settings.OPENAI_MODEL
+    groups: list[list[Note]] = []
+    group: list[Note] = []
+    used = 0
+    for note in notes:
+        tokens = count_tokens(note.text, model) + 1
+        if len(group) >= 2 and used + tokens > budget:
+            groups.append(group)
+            group, used = [], 0
+        group.append(note)
+        used += tokens
+    if len(group) == 1 and groups:
+        # A lone trailing note joins the previous group rather than being reduced by itself.
+        groups[-1].extend(group)
+    elif group:
+        groups.append(group)
+    return [(build_reduce_prompt("\n\n".join(note.text for note in group)), group) for group in groups]
+
+
+def _tagged(text: str) -> set[int]:
+    return {int(i) for tag in _SOURCE_TAG.findall(text) for i in _SOURCE_INDEX.findall(tag)}
+
+
+def _attribute(text: str, inputs: list[Note]) -> Note:
+    """Attribute ``text`` to the chunks behind the inputs it was written from.
+
+    Tags only narrow the attribution, and only among the chunks an input
+    itself showed tags for: if the note tags none of them (including when the
+    model drops every tag), the input's chunks are all kept, as are chunks an
+    input carried without a tag.
+    """
+    tagged = _tagged(text)
+    sources: set[int] = set()
+    for note in inputs:
+        shown = _tagged(note.text) & note.sources
+        sources |= (shown & tagged) or shown
+        sources |= note.sources - shown
+    return Note(text, frozenset(sources))
+
+
+def map_reduce(chunks: list[dict[str, Any]], complete: Complete) -> list[Note]:
+    """Summarize ``chunks`` into notes that fit the context budget.
+
+    Each level's calls run concurrently on the shared pool. Every note keeps
+    the chunk indices it came from; see ``cite_notes``.
+    """
+
+    def call(prompt: str, inputs: list[Note]) -> Note:
+        return _attribute(complete(_messages(prompt)), inputs)
+
+    notes = list(_pool.map(lambda item: call(*item), _map_prompts(chunks)))
+    budget = _reduce_budget()
+    while len(notes) > 1 and not _fits(notes, budget):
+        notes = list(_pool.map(lambda item: call(*item), _reduce_prompts(notes, budget)))
+    return notes
+
+
+async def amap_reduce(chunks: list[dict[str, Any]], complete: AsyncComplete) -> list[Note]:
+    """``map_reduce`` with the calls as tasks on the running loop."""
+    semaphore = _semaphore()
+
+    async def call(prompt: str, inputs: list[Note]) -> Note:
+        async with semaphore:
+            return _attribute(await complete(_messages(prompt)), inputs)
+
+    calls = await asyncio.to_thread(_map_prompts, chunks)
+    notes = list(await asyncio.gather(*(call(*item) for item in calls)))
+    budget = _reduce_budget()
+    while len(notes) > 1 and not _fits(notes, budget):
+        notes = list(await asyncio.gather(*(call(*item) for item in _reduce_prompts(notes, budget))))
+    return notes
+
+
+def source_indices(notes: list[Note]) -> set[int]:
+    """Every chunk index ``notes`` were written from."""
+    return set().union(*(note.sources for note in notes))
+
+
+def cite_notes(notes: list[Note], known: set[int]) -> tuple[str, list[int]]:
+    """Relabel ``[#chunk_index]`` tags in ``notes`` as ``[C1]``, ``[C2]``, ...
+
+    Every chunk a note came from is cited, tagged or not; chunks outside
+    ``known`` are dropped. Returns the relabelled context block and the cited
+    chunk indices in document order, so ``C<n>`` refers to the n-th one.
+    """
+    cited = sorted(source_indices(notes) & known)
+    labels = {chunk_index: f"C{n + 1}" for n, chunk_index in enumerate(cited)}
+
+    def relabel(match: re.Match) -> str:
+        return "".join(f"[{labels[int(i)]}]" for i in _SOURCE_INDEX.findall(match.group(0)) if int(i) in labels)
+
+    return _SOURCE_TAG.sub(relabel, "\n\n".join(note.text.strip() for note in notes)), cited
@@ -1,33 +1,180 @@
 from __future__ import annotations
 
+import re
+from typing import Iterable, Iterator
+
+from .tokens import count_tokens
 
-def chunk_text(text: str, chunk_size: int = 800, overlap: int = 120) -> list[str]:
-    cleaned = " ".join(text.split())
-    if not cleaned:
-        return []
 
+def _normalize_sizes(chunk_size: int, overlap: int) -> tuple[int, int]:
     if chunk_size <= 0:
         chunk_size = 800
     if overlap < 0:
         overlap = 0
     if overlap >= chunk_size:
         overlap = max(0, chunk_size // 3)
+    return chunk_size, overlap
+
+
+def _next_start(start: int, end: int, overlap: int) -> int:
+    # Snapping ``end`` back to a space can put ``end - overlap`` behind the
+    # current start when the overlap is large; always make progress.
+    return max(start + 1, end - overlap)
 
-    chunks: list[str] = []
+
+def iter_chunks(pieces: Iterable[str], chunk_size: int = 800, overlap: int = 120) -> Iterator[str]:
+    """Streaming variant of ``chunk_text`` over text pieces such as PDF pages.
+
+    Yields exactly the chunks ``chunk_text("\\n".join(pieces))`` would return,
+    but only keeps the not-yet-chunked tail of the text in memory.
+    """
+    chunk_size, overlap = _normalize_sizes(chunk_size, overlap)
+    buffer = ""
     start = 0
-    length = len(cleaned)
 
+    for piece in pieces:
+        cleaned = " ".join(piece.split())
+        if not cleaned:
+            continue
+        if start > len(buffer) // 2:
+            buffer = buffer[start:]
+            start = 0
+        buffer = f"{buffer} {cleaned}" if buffer else cleaned
+
+        # While a full window fits before the end of the buffer, later pieces
+        # cannot change where this chunk ends, so it is safe to emit now.
+        while start + chunk_size < len(buffer):
+            end = start + chunk_size
+            space = buffer.rfind(" ", start, end)
+            if space > start + (chunk_size // 2):
+                end = space
+            chunk = buffer[start:end].strip()
+            if chunk:
+                yield chunk
+            start = _next_start(start, end, overlap)
+
+    length = len(buffer)
     while start < length:
         end = min(length, start + chunk_size)
         if end < length:
-            space = cleaned.rfind(" ", start, end)
+            space = buffer.rfind(" ", start, end)
             if space > start + (chunk_size // 2):
                 end = space
-        chunk = cleaned[start:end].strip()
+        chunk = buffer[start:end].strip()
         if chunk:
-            chunks.append(chunk)
+            yield chunk
         if end >= length:
             break
-        start = max(0, end - overlap)
+        start = _next_start(start, end, overlap)
+
+
+def chunk_text(text: str, chunk_size: int = 800, overlap: int = 120) -> list[str]:
+    return list(iter_chunks([text], chunk_size, overlap))
+
+
+# Sentence ends (., ! or ? followed by whitespace) and blank-line paragraph breaks.
+_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n[ \t]*\n\s*")
+
+
+def iter_sentences(pieces: Iterable[str]) -> Iterator[tuple[str, bool]]:
+    """Yield ``(sentence, starts_paragraph)`` with whitespace collapsed.
+
+    Works on one piece at a time; a sentence cut by a page break is carried
+    over and completed by the next piece.
+    """
+    carry = ""
+    paragraph = True
+    for piece in pieces:
+        pos = 0
+        for match in _BOUNDARY.finditer(piece):
+            text = piece[pos : match.start()]
+            if carry:
+                text = f"{carry} {text}"
+                carry = ""
+            sentence = " ".join(text.split())
+            if sentence:
+                yield sentence, paragraph
+                paragraph = False
+            if match.group().count("\n") >= 2:
+                paragraph = True
+            pos = match.end()
+        tail = piece[pos:]
+        carry = f"{carry} {tail}" if carry else tail
+    sentence = " ".join(carry.split())
+    if sentence:
+        yield sentence, paragraph
+
+
+def _split_oversized(sentence: str, max_tokens: int, model: str) -> Iterator[tuple[str, int]]:
+    words: list[str] = []
+    tokens = 0
+    for word in sentence.split(" "):
+        word_tokens = count_tokens(" " + word, model)
+        if words and tokens + word_tokens > max_tokens:
+            yield " ".join(words), tokens
+            words, tokens = [], 0
+        words.append(word)
+        tokens += word_tokens
+    if words:
+        yield " ".join(words), tokens
+
+
+def _join_units(units: list[tuple[str, int, bool]]) -> str:
+    parts: list[str] = []
+    for i, (text, _, paragraph) in enumerate(units):
+        if i:
+            parts.append("\n" if paragraph else " ")
+        parts.append(text)
+    return "".join(parts)
+
+
+def iter_token_chunks(
+    pieces: Iterable[str],
+    chunk_tokens: int = 256,
+    overlap_tokens: int = 32,
+    model: str = "text-embedding-3-small",
+) -> Iterator[str]:
+    """Chunk text by embedding-model tokens, cutting only between sentences.
+
+    A single pass over ``pieces``: sentences are packed into a chunk until the
+    next one would exceed ``chunk_tokens``, a new paragraph closes a chunk that
+    is already three-quarters full, and the trailing sentences (up to
+    ``overlap_tokens``) are repeated at the start of the next chunk. Only
+    sentences longer than a whole chunk are split between words. Paragraph
+    breaks are kept as newlines.
+    """
+    if chunk_tokens <= 0:
+        chunk_tokens = 256
+    if overlap_tokens < 0:
+        overlap_tokens = 0
+    if overlap_tokens >= chunk_tokens // 2:
+        overlap_tokens = chunk_tokens // 4
+    soft_limit = chunk_tokens * 3 // 4
 
-    return chunks
+    units: list[tuple[str, int, bool]] = []
+    total = 0
+    fresh = False
+    for sentence, paragraph in iter_sentences(pieces):
+        tokens = count_tokens(sentence, model)
+        parts = _split_oversized(sentence, chunk_tokens, model) if tokens > chunk_tokens else [(sentence, tokens)]
+        for text, tokens in parts:
+            if units and (total + tokens > chunk_tokens or (paragraph and total >= soft_limit)):
+                if fresh:
+                    yield _join_units(units)
+                    fresh = False
+                    kept: list[tuple[str, int, bool]] = []
+                    kept_tokens = 0
+                    for unit in reversed(units):
+                        if kept_tokens + unit[1] > overlap_tokens:
+                            break
+                        kept.append(unit)
+                        kept_tokens += unit[1]
+                    units, total = kept[::-1], kept_tokens
+                if total + tokens > chunk_tokens:
+                    units, total = [], 0
+            units.append((text, tokens, paragraph))
+            total += tokens
+            fresh = True
+            paragraph = False
+    if fresh:
+        yield _join_units(units)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+
+from .chunking import iter_sentences
+from .tokens import count_tokens
+
+# "\n\n" between context entries.
+_SEPARATOR_TOKENS = 1
+# A truncated tail shorter than this is not worth its header; drop it instead.
+_MIN_TAIL_TOKENS = 32
+
+
+@dataclass
+class PackReport:
+    budget: int
+    tokens: int = 0
+    kept: int = 0
+    truncated: str | None = None
+    dropped: list[str] = field(default_factory=list)
+
+
+def truncate_at_sentence(text: str, max_tokens: int, model: str) -> str:
+    """Longest run of leading sentences of ``text`` that fits in ``max_tokens``."""
+    kept: list[str] = []
+    used = 0
+    for sentence, _ in iter_sentences([text]):
+        tokens = count_tokens(sentence, model) + (1 if kept else 0)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+    return " ".join(kept)
+
+
+def pack(
+    entries: list[tuple[str, str, str]], budget: int, model: str
+) -> tuple[list[tuple[str, str]], PackReport]:
+    """Fit ``(entry_id, header, text)`` entries into ``budget`` prompt tokens.
+
+    Entries are taken in the order given, which callers use for relevance.
+    The first entry that does not fit is cut at a sentence boundary and
+    every entry after it is dropped. Returns the kept ``(entry_id, text)``
+    pairs and a report of what was truncated or dropped. A budget of 0 or
+    less keeps everything.
+    """
+    report = PackReport(budget=budget)
+    kept: list[tuple[str, str]] = []
+    for position, (entry_id, header, text) in enumerate(entries):
+        header_tokens = count_tokens(header, model) + (_SEPARATOR_TOKENS if kept else 0)
+        text_tokens = count_tokens(text, model)
+        if budget <= 0 or report.tokens + header_tokens + text_tokens <= budget:
+            kept.append((entry_id, text))
+            report.tokens += header_tokens + text_tokens
+            continue
+        room = budget - report.tokens - header_tokens
+        tail = truncate_at_sentence(text, room, model) if room >= _MIN_TAIL_TOKENS else ""
+        if tail:
+            kept.append((entry_id, tail))
+            report.tokens += header_tokens + count_tokens(tail, model)
+            report.truncated = entry_id
+        else:
+            report.dropped.append(entry_id)
+        report.dropped.extend(entry[0] for entry in entries[position + 1 :])
+        break
+    report.kept = len(kept)
+    return kept, report
+
+
+class PackingStats:
+    """Running totals of what the packer kept, cut and dropped."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._packed = 0
+        self._truncated = 0
+        self._dropped = 0
+        self._tokens = 0
+
+    def record(self, report: PackReport) -> None:
+        with self._lock:
+            self._packed += 1
+            self._truncated += report.truncated is not None
+            self._dropped += len(report.dropped)
+            self._tokens += report.tokens
+
+    def stats(self) -> dict[str, float | int]:
+        with self._lock:
+            return {
+                "contexts": self._packed,
+                "truncated_chunks": self._truncated,
+                "dropped_chunks": self._dropped,
+                "avg_tokens": round(self._tokens / self._packed, 1) if self._packed else 0.0,
+            }
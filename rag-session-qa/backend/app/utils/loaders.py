@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+import io
+import multiprocessing
 import os
-from typing import Optional
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator, Optional, Union
 
 from pypdf import PdfReader
 from docx import Document
 
+from .processes import pid_alive
+
+
+# A document to load: a filesystem path, the raw upload bytes, or a binary file object.
+Source = Union[str, bytes, memoryview, BinaryIO]
 
 SUPPORTED_MIME_TYPES = {
     "application/pdf": "pdf",
@@ -14,7 +25,7 @@ SUPPORTED_MIME_TYPES = {
 }
 
 
-def _guess_type(content_type: Optional[str], filename: str) -> str:
+def guess_type(content_type: Optional[str], filename: str) -> str:
     if content_type in SUPPORTED_MIME_TYPES:
         return SUPPORTED_MIME_TYPES[content_type]
     ext = os.path.splitext(filename.lower())[1]
@@ -27,23 +38,181 @@ def _guess_type(content_type: Optional[str], filename: str) -> str:
     raise ValueError("Unsupported file type. Please upload PDF, DOCX, or TXT.")
 
 
-def extract_text(file_path: str, content_type: Optional[str], filename: str) -> str:
-    file_type = _guess_type(content_type, filename)
-    if file_type == "pdf":
-        reader = PdfReader(file_path)
-        pages = []
+# Plain-text files are yielded in blocks of roughly this many characters.
+_TEXT_BLOCK_CHARS = 64 * 1024
+# Page ranges handed out per PDF worker; more ranges balance uneven pages better.
+_RANGES_PER_WORKER = 2
+
+# PDF copies for worker processes are named "<prefix><pid>-*.pdf" so that
+# copies left behind by a process that died can be found and removed.
+_PDF_COPY_PREFIX = "rag-pdf-"
+
+_pdf_pool: ProcessPoolExecutor | None = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _remove_stale_pdf_copies() -> None:
+    """Delete PDF copies whose owning process is gone (or is this one, before it made any)."""
+    directory = tempfile.gettempdir()
+    for name in os.listdir(directory):
+        if not (name.startswith(_PDF_COPY_PREFIX) and name.endswith(".pdf")):
+            continue
+        pid = name[len(_PDF_COPY_PREFIX):].split("-", 1)[0]
+        if not pid.isdigit():
+            continue
+        if int(pid) != os.getpid() and pid_alive(int(pid)):
+            continue
+        try:
+            os.unlink(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def _get_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Runs before this process writes any copy of its own.
+            _remove_stale_pdf_copies()
+            # "spawn" avoids forking a process that already runs server threads.
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_pool
+
+
+def spool_upload(data: bytes, max_in_memory: int) -> Union[bytes, BinaryIO]:
+    """Keep small uploads in memory; move larger ones to an anonymous temp file.
+
+    ``tempfile.TemporaryFile`` is unlinked as soon as it is created, so nothing
+    is left behind on disk even if the process dies mid-ingest.
+    """
+    if len(data) <= max_in_memory:
+        return data
+    spooled = tempfile.TemporaryFile()
+    spooled.write(data)
+    spooled.seek(0)
+    return spooled
+
+
+def _open_binary(source: Source) -> Union[str, BinaryIO]:
+    if isinstance(source, str):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        # BytesIO shares the bytes object's buffer until it is written to.
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def _pdf_path(source: Source) -> tuple[str, bool]:
+    """A filesystem path worker processes can open, and whether it is a temp copy to remove.
+
+    Copies are removed once extracted; one left by a crash is removed when
+    the next process starts its PDF pool.
+    """
+    if isinstance(source, str):
+        return source, False
+    prefix = f"{_PDF_COPY_PREFIX}{os.getpid()}-"
+    with tempfile.NamedTemporaryFile(prefix=prefix, suffix=".pdf", delete=False) as spooled:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            spooled.write(source)
+        else:
+            source.seek(0)
+            shutil.copyfileobj(source, spooled)
+    return spooled.name, True
+
+
+# The reader a PDF worker process last opened, so the ranges of one document
+# that land on the same worker read and parse it only once.
+_worker_reader: tuple[tuple[str, int, int], PdfReader] | None = None
+
+
+def _extract_pdf_range(path: str, start: int, stop: int) -> list[str]:
+    global _worker_reader
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if _worker_reader is None or _worker_reader[0] != key:
+        _worker_reader = (key, PdfReader(path))
+    reader = _worker_reader[1]
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _iter_pdf_pages(source: Source, workers: int, parallel_min_pages: int) -> Iterator[str]:
+    reader = PdfReader(_open_binary(source))
+    num_pages = len(reader.pages)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or num_pages < max(2, parallel_min_pages):
         for page in reader.pages:
-            text = page.extract_text() or ""
-            pages.append(text)
-        return "\n".join(pages).strip()
+            yield page.extract_text() or ""
+        return
+
+    step = -(-num_pages // (workers * _RANGES_PER_WORKER))
+    starts = list(range(0, num_pages, step))
+    stops = [min(num_pages, start + step) for start in starts]
+    pool = _get_pdf_pool(workers)
+    # Workers read the document from disk; each task only carries its page range.
+    path, is_temp = _pdf_path(source)
+    try:
+        # map() returns ranges in submission order, so pages come back in order.
+        for pages in pool.map(_extract_pdf_range, [path] * len(starts), starts, stops):
+            yield from pages
+    finally:
+        if is_temp:
+            os.unlink(path)
+
+
+def iter_pages(
+    source: Source,
+    content_type: Optional[str],
+    filename: str,
+    pdf_workers: int = 1,
+    pdf_parallel_min_pages: int = 32,
+) -> Iterator[str]:
+    """Yield the document's text one page (PDF), paragraph (DOCX) or block (TXT) at a time.
+
+    ``source`` may be a path, the upload's bytes or a binary file object, so
+    uploads never need a temp-file round trip. Joining the pieces with
+    newlines gives the full document text. PDFs with at
+    least ``pdf_parallel_min_pages`` pages are extracted by ``pdf_workers``
+    processes (0 means one per CPU); pages are still yielded in order.
+    """
+    file_type = guess_type(content_type, filename)
+    if file_type == "pdf":
+        yield from _iter_pdf_pages(source, pdf_workers, pdf_parallel_min_pages)
+        return
 
     if file_type == "docx":
-        doc = Document(file_path)
-        paras = [p.text for p in doc.paragraphs if p.text]
-        return "\n".join(paras).strip()
+        doc = Document(_open_binary(source))
+        for p in doc.paragraphs:
+            if p.text:
+                yield p.text
+        return
 
     if file_type == "txt":
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read().strip()
+        binary = _open_binary(source)
+        if isinstance(binary, str):
+            f = open(binary, "r", encoding="utf-8", errors="ignore")
+        else:
+            f = io.TextIOWrapper(binary, encoding="utf-8", errors="ignore")
+        try:
+            block: list[str] = []
+            size = 0
+            for line in f:
+                block.append(line)
+                size += len(line)
+                if size >= _TEXT_BLOCK_CHARS:
+                    yield "".join(block).rstrip("\n")
+                    block, size = [], 0
+            if block:
+                yield "".join(block).rstrip("\n")
+        finally:
+            if isinstance(binary, str):
+                f.close()
+            else:
+                # Leave the caller's file object open.
+                f.detach()
+        return
 
     raise ValueError("Unsupported file type. Please upload PDF, DOCX, or TXT.")
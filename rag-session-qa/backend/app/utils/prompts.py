@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+# Bump whenever the summary, map or reduce prompts change, so cached summaries are regenerated.
+SUMMARY_PROMPT_VERSION = 1
+
 
 def build_answer_prompt(context_block: str, question: str) -> str:
     return (
@@ -18,3 +21,21 @@ def build_summary_prompt(context_block: str) -> str:
         "Write 8-12 short lines.\n\n"
         f"Context:\n{context_block}\n"
     )
+
+
+def build_map_prompt(context_block: str) -> str:
+    return (
+        "Write concise notes on this part of a document using ONLY the provided context. "
+        "Keep names, numbers and outcomes. End every note with the tags of the passages "
+        "it comes from, for example [#4] or [#4][#5].\n\n"
+        f"Context:\n{context_block}\n"
+    )
+
+
+def build_reduce_prompt(notes_block: str) -> str:
+    return (
+        "Merge these notes on consecutive parts of a document into fewer, shorter notes, "
+        "keeping the most important points in order. Keep the [#n] tags of every note "
+        "you draw on at the end of the merged note.\n\n"
+        f"Notes:\n{notes_block}\n"
+    )
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any
+
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None
+
+# Used when tiktoken (or its encoding files) is unavailable: ~4 characters per
+# token is OpenAI's rule of thumb for English text.
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: str) -> Any | None:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN) if text else 0
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def has_tokenizer(model: str) -> bool:
+    """Whether ``count_tokens`` is exact for ``model`` rather than estimated."""
+    return _encoding(model) is not None
@@ -1,107 +1,435 @@
 from __future__ import annotations
 
-from typing import Any
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+from uuid import uuid4
 
-import chromadb
-from chromadb.config import Settings as ChromaSettings
+from .config import settings
+from .lexical import BM25Index, reciprocal_rank_fusion
+from .stores.base import VectorStore
+from .stores.chroma import ChromaStore, PersistentChromaStore
+from .stores.numpy_store import NumpyStore
 
-_COLLECTION_NAME = "rag_session"
+_COLLECTION_PREFIX = "rag_index_"
+# Rough per-chunk allowance for ids, metadata and index bookkeeping.
+_CHUNK_OVERHEAD_BYTES = 256
+# How many evicted/expired session ids we remember to report 410 instead of 400.
+_MAX_TOMBSTONES = 10_000
 
-_client = chromadb.Client(
-    ChromaSettings(allow_reset=True, anonymized_telemetry=False)
-)
-_collection = None
-_current_session_id: str | None = None
+
+STORES = {
+    "chroma": ChromaStore,
+    "chroma-persistent": lambda: PersistentChromaStore(settings.CHROMA_PERSIST_PATH, _COLLECTION_PREFIX),
+    "numpy": NumpyStore,
+}
 
 
-def reset_session(session_id: str) -> None:
-    global _collection, _current_session_id
+def create_store(name: str) -> VectorStore:
     try:
-        _client.delete_collection(_COLLECTION_NAME)
-    except Exception:
-        pass
-    _collection = _client.create_collection(
-        _COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
-    )
-    _current_session_id = session_id
+        factory = STORES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown VECTOR_BACKEND {name!r}; expected one of: {', '.join(sorted(STORES))}."
+        ) from None
+    return factory()
+
+
+_store = create_store(settings.VECTOR_BACKEND)
+
+
+class SessionExpiredError(ValueError):
+    """The session existed but was evicted or timed out."""
+
+
+@dataclass
+class _Index:
+    """One backend index, shared by every session that uploaded the same content."""
 
+    name: str
+    content_key: str | None = None
+    num_chunks: int = 0
+    nbytes: int = 0
+    sealed: bool = False
+    # Set once the backend index has been deleted (eviction, expiry, failed ingest).
+    dropped: bool = False
+    sessions: set[str] = field(default_factory=set)
+    # Every chunk in upsert order, so reads never go back to the store.
+    rows: list[dict[str, Any]] = field(default_factory=list)
+    positions: dict[int, int] = field(default_factory=dict)
+    in_order: bool = True
+    # BM25 postings for hybrid search; document ids are positions in ``rows``.
+    lexical: BM25Index | None = None
+    # Derived structures built at ingest, such as the event table.
+    artifacts: dict[str, Any] = field(default_factory=dict)
 
-def get_current_session_id() -> str | None:
-    return _current_session_id
 
+@dataclass
+class _Session:
+    index: _Index
+    last_access: float = field(default_factory=time.monotonic)
 
-def _ensure_collection():
-    global _collection
-    if _collection is None:
-        _collection = _client.create_collection(
-            _COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+
+def _estimate_bytes(chunks: list[str], embeddings: list[list[float]]) -> int:
+    total = 0
+    for text, embedding in zip(chunks, embeddings):
+        total += len(text.encode("utf-8")) + 4 * len(embedding) + _CHUNK_OVERHEAD_BYTES
+    return total
+
+
+class SessionManager:
+    """Registry of sessions and the indexes they read from, under a global memory budget.
+
+    Sessions are kept in least-recently-used order. Several sessions may share
+    one sealed index when they uploaded identical content; an index is dropped
+    once its last session goes away. When a sealed index leaves the store over
+    ``max_chunks``/``max_bytes``, the least recently queried sessions are
+    evicted, and a background sweeper drops sessions idle for longer than
+    ``ttl_seconds``. Nothing is evicted while an upload is still streaming in,
+    so one that turns out too large fails without costing anyone a session.
+    """
+
+    def __init__(self, max_chunks: int, max_bytes: int, ttl_seconds: int, sweep_interval: int) -> None:
+        self.max_chunks = max_chunks
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._by_content: dict[str, _Index] = {}
+        self._expired: OrderedDict[str, None] = OrderedDict()
+        self._total_chunks = 0
+        self._total_bytes = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._reused = 0
+        self._lock = threading.RLock()
+        self._sweeper: threading.Thread | None = None
+
+    def create(self, session_id: str, content_key: str | None = None) -> None:
+        name = _COLLECTION_PREFIX + uuid4().hex
+        _store.create(name)
+        index = _Index(
+            name=name,
+            content_key=content_key,
+            lexical=BM25Index() if settings.HYBRID_SEARCH else None,
         )
-    return _collection
+        with self._lock:
+            self._attach(session_id, index)
+        self._ensure_sweeper()
+
+    def attach(self, session_id: str, content_key: str) -> int | None:
+        """Point a new session at the sealed index for ``content_key``, if any."""
+        with self._lock:
+            index = self._by_content.get(content_key)
+            if index is None:
+                return None
+            self._attach(session_id, index)
+            self._reused += 1
+            num_chunks = index.num_chunks
+        self._ensure_sweeper()
+        return num_chunks
+
+    def seal(self, session_id: str) -> None:
+        """Mark the session's index complete, publish it for reuse and evict LRU sessions to fit it."""
+        with self._lock:
+            index = self.get(session_id).index
+            index.sealed = True
+            if index.content_key is not None:
+                self._by_content.setdefault(index.content_key, index)
+            for victim, session in list(self._sessions.items()):
+                if self._total_chunks <= self.max_chunks and self._total_bytes <= self.max_bytes:
+                    break
+                # Uploads still in progress are left to evict for themselves once sealed.
+                if victim not in index.sessions and session.index.sealed:
+                    self._detach(victim)
+                    self._tombstone(victim)
+                    self._evictions += 1
+
+    def get(self, session_id: str) -> _Session:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if session_id in self._expired:
+                    raise SessionExpiredError("Session expired. Please upload the document again.")
+                raise ValueError("Session not found. Please upload a document.")
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def reserve(self, session_id: str, num_chunks: int, nbytes: int) -> _Index:
+        """Account for chunks about to be added; eviction waits until the index is sealed."""
+        with self._lock:
+            index = self.get(session_id).index
+            if index.sealed:
+                raise ValueError("Session index is read-only.")
+            if index.num_chunks + num_chunks > self.max_chunks or index.nbytes + nbytes > self.max_bytes:
+                raise ValueError("Document is too large for the session memory budget.")
+            index.num_chunks += num_chunks
+            index.nbytes += nbytes
+            self._total_chunks += num_chunks
+            self._total_bytes += nbytes
+            return index
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._detach(session_id)
+
+    def sweep(self) -> list[str]:
+        if self.ttl_seconds <= 0:
+            return []
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired: list[str] = []
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                # Sessions are in LRU order, so the first fresh one ends the scan.
+                if session.last_access > cutoff:
+                    break
+                self._detach(session_id)
+                self._tombstone(session_id)
+                expired.append(session_id)
+            self._expirations += len(expired)
+        return expired
+
+    def has(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def session_ids(self) -> list[str]:
+        with self._lock:
+            return list(self._sessions)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "indexes": len({id(s.index) for s in self._sessions.values()}),
+                "chunks": self._total_chunks,
+                "bytes": self._total_bytes,
+                "max_chunks": self.max_chunks,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "reused_indexes": self._reused,
+            }
+
+    def _attach(self, session_id: str, index: _Index) -> None:
+        self._detach(session_id)
+        self._expired.pop(session_id, None)
+        index.sessions.add(session_id)
+        self._sessions[session_id] = _Session(index)
+
+    def _detach(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        index = session.index
+        index.sessions.discard(session_id)
+        if index.sessions:
+            return
+        if index.content_key is not None and self._by_content.get(index.content_key) is index:
+            del self._by_content[index.content_key]
+        self._total_chunks -= index.num_chunks
+        self._total_bytes -= index.nbytes
+        index.dropped = True
+        _store.delete(index.name)
+
+    def _tombstone(self, session_id: str) -> None:
+        self._expired[session_id] = None
+        while len(self._expired) > _MAX_TOMBSTONES:
+            self._expired.popitem(last=False)
+
+    def _ensure_sweeper(self) -> None:
+        if self.ttl_seconds <= 0 or self._sweeper is not None:
+            return
+        with self._lock:
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(
+                    target=self._sweep_forever, name="session-sweeper", daemon=True
+                )
+                self._sweeper.start()
+
+    def _sweep_forever(self) -> None:
+        interval = max(1, self.sweep_interval)
+        while True:
+            time.sleep(interval)
+            try:
+                self.sweep()
+            except Exception:
+                pass
+
+
+_sessions = SessionManager(
+    max_chunks=settings.SESSION_MAX_CHUNKS,
+    max_bytes=settings.SESSION_MAX_BYTES,
+    ttl_seconds=settings.SESSION_TTL_SECONDS,
+    sweep_interval=settings.SESSION_SWEEP_INTERVAL_SECONDS,
+)
+
+
+def reset_session(session_id: str, content_key: str | None = None) -> None:
+    _sessions.create(session_id, content_key)
+
+
+def attach_session(session_id: str, content_key: str) -> int | None:
+    """Reuse an already indexed document for ``session_id``; returns its chunk count."""
+    return _sessions.attach(session_id, content_key)
+
+
+def seal_session(session_id: str) -> None:
+    _sessions.seal(session_id)
+
+
+def delete_session(session_id: str) -> None:
+    _sessions.delete(session_id)
+
+
+def has_session(session_id: str) -> bool:
+    return _sessions.has(session_id)
+
+
+def session_stats() -> dict[str, int]:
+    return _sessions.stats()
+
+
+def index_version(session_id: str) -> str:
+    """Changes whenever the session is pointed at another index or chunks are added."""
+    index = _sessions.get(session_id).index
+    return f"{index.name}:{index.num_chunks}"
+
+
+def set_artifact(session_id: str, name: str, value: Any) -> None:
+    """Attach a structure derived from the document to the session's index."""
+    _sessions.get(session_id).index.artifacts[name] = value
+
+
+def get_artifact(session_id: str, name: str) -> Any | None:
+    return _sessions.get(session_id).index.artifacts.get(name)
+
+
+def _localize(session_id: str, chunk_id: str, metadata: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+    # Indexes can be shared between sessions, so ids and metadata are
+    # reported in terms of the session that asked for them.
+    chunk_index = metadata.get("chunk_index", chunk_id.rsplit("_", 1)[-1])
+    return f"{session_id}_{chunk_index}", {**metadata, "session_id": session_id}
+
+
+def localize_chunk(session_id: str, chunk: dict[str, Any]) -> dict[str, Any]:
+    """Re-point a chunk (or citation) reported for another session at ``session_id``."""
+    chunk_id, metadata = _localize(session_id, chunk.get("chunk_id") or "", chunk.get("metadata") or {})
+    return {**chunk, "chunk_id": chunk_id, "metadata": metadata}
+
+
+@contextmanager
+def _store_call(index: _Index) -> Iterator[None]:
+    """Report a store call that lost a race with eviction or expiry as an expired session."""
+    try:
+        yield
+    except Exception as exc:
+        if index.dropped:
+            raise SessionExpiredError("Session expired. Please upload the document again.") from exc
+        raise
 
 
 def upsert_chunks(
     session_id: str, chunks: list[str], metadatas: list[dict[str, Any]], embeddings: list[list[float]]
 ) -> None:
-    if session_id != _current_session_id:
-        raise ValueError("Session mismatch or expired session.")
-    collection = _ensure_collection()
-    ids = [f"{session_id}_{i}" for i in range(len(chunks))]
-    collection.add(
-        ids=ids,
-        documents=chunks,
-        metadatas=metadatas,
-        embeddings=embeddings,
-    )
+    index = _sessions.reserve(session_id, len(chunks), _estimate_bytes(chunks, embeddings))
+    ids = [f"{index.name}_{meta.get('chunk_index', i)}" for i, meta in enumerate(metadatas)]
+    with _store_call(index):
+        _store.upsert(index.name, ids, chunks, metadatas, embeddings)
+    # Only the ingest that owns an unsealed index appends to it.
+    for chunk_id, text, meta in zip(ids, chunks, metadatas):
+        chunk_index = meta.get("chunk_index", len(index.rows))
+        if index.rows and chunk_index <= index.rows[-1]["metadata"].get("chunk_index", -1):
+            index.in_order = False
+        index.positions[chunk_index] = len(index.rows)
+        index.rows.append({"chunk_id": chunk_id, "text": text, "metadata": meta})
+    if index.lexical is not None:
+        index.lexical.add(chunks)
 
 
-def query(session_id: str, query_embedding: list[float], top_k: int) -> list[dict[str, Any]]:
-    if session_id != _current_session_id:
-        raise ValueError("Session not found. Please upload a document.")
-    collection = _ensure_collection()
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=top_k,
-        include=["documents", "metadatas", "distances"],
+def _fuse(index: _Index, dense: list[dict[str, Any]], query_text: str, top_k: int, candidates: int) -> list[dict[str, Any]]:
+    by_id = {item["chunk_id"]: item for item in dense}
+    lexical_ids: list[str] = []
+    for position, _ in index.lexical.search(query_text, candidates):
+        row = index.rows[position]
+        lexical_ids.append(row["chunk_id"])
+        # Chunks only BM25 found have no dense distance.
+        by_id.setdefault(row["chunk_id"], {**row, "score": None})
+    fused = reciprocal_rank_fusion(
+        [
+            ([item["chunk_id"] for item in dense], settings.HYBRID_DENSE_WEIGHT),
+            (lexical_ids, settings.HYBRID_LEXICAL_WEIGHT),
+        ],
+        k=settings.HYBRID_RRF_K,
+        top_k=top_k,
     )
-    docs = results.get("documents", [[]])[0]
-    metas = results.get("metadatas", [[]])[0]
-    dists = results.get("distances", [[]])[0]
-    ids = results.get("ids", [[]])[0]
-
-    formatted = []
-    for i, doc in enumerate(docs):
-        formatted.append(
-            {
-                "chunk_id": ids[i],
-                "text": doc,
-                "metadata": metas[i],
-                "score": dists[i],
-            }
-        )
-    return formatted
+    return [{**by_id[chunk_id], "fusion_score": fused_score} for chunk_id, fused_score in fused]
 
 
-def get_chunks(session_id: str, limit: int | None = None) -> list[dict[str, Any]]:
-    if session_id != _current_session_id:
-        raise ValueError("Session not found. Please upload a document.")
-    collection = _ensure_collection()
-    results = collection.get(include=["documents", "metadatas"])
-    docs = results.get("documents", [])
-    metas = results.get("metadatas", [])
-    ids = results.get("ids", [])
-
-    combined = []
-    for i, doc in enumerate(docs):
-        chunk_id = ids[i] if i < len(ids) else f"{session_id}_{i}"
-        combined.append(
-            {
-                "chunk_id": chunk_id,
-                "text": doc,
-                "metadata": metas[i],
-            }
-        )
+def query_many(
+    session_id: str,
+    query_embeddings: list[list[float]],
+    top_k: int,
+    query_texts: list[str] | None = None,
+    include_embeddings: bool = False,
+) -> list[list[dict[str, Any]]]:
+    """Return the ``top_k`` chunks most relevant to each query, with one batched dense search.
+
+    Returns one result list per query embedding, in order. ``query_texts``,
+    if given, pairs each embedding with its text: with ``HYBRID_SEARCH``
+    enabled, dense and BM25 results are merged by weighted reciprocal rank
+    fusion and carry a ``fusion_score``; ``score`` stays the dense distance
+    and is ``None`` for chunks only the lexical index matched.
+    ``include_embeddings`` adds each chunk's stored ``embedding``.
+    """
+    index = _sessions.get(session_id).index
+    hybrid = query_texts is not None and index.lexical is not None and len(index.lexical) > 0
+    candidates = max(top_k, settings.HYBRID_CANDIDATES) if hybrid else top_k
+    with _store_call(index):
+        batches = _store.query_many(index.name, query_embeddings, candidates)
+    if hybrid:
+        batches = [
+            _fuse(index, dense, text, top_k, candidates) if text else dense[:top_k]
+            for dense, text in zip(batches, query_texts)
+        ]
+    if include_embeddings:
+        wanted = list(dict.fromkeys(item["chunk_id"] for results in batches for item in results))
+        with _store_call(index):
+            vectors = _store.get_embeddings(index.name, wanted) if wanted else {}
+        for results in batches:
+            for item in results:
+                item["embedding"] = vectors.get(item["chunk_id"])
+    for results in batches:
+        for item in results:
+            item["chunk_id"], item["metadata"] = _localize(session_id, item["chunk_id"], item["metadata"])
+    return batches
+
+
+def _localized_row(session_id: str, row: dict[str, Any]) -> dict[str, Any]:
+    chunk_id, metadata = _localize(session_id, row["chunk_id"], row["metadata"])
+    return {"chunk_id": chunk_id, "text": row["text"], "metadata": metadata}
 
-    combined.sort(key=lambda x: x["metadata"].get("chunk_index", 0))
+
+def get_chunks(session_id: str, limit: int | None = None) -> list[dict[str, Any]]:
+    """Return the session's chunks in ``chunk_index`` order, the first ``limit`` only if given."""
+    index = _sessions.get(session_id).index
+    rows = index.rows
+    if not index.in_order:
+        rows = sorted(rows, key=lambda row: row["metadata"].get("chunk_index", 0))
     if limit is not None:
-        combined = combined[:limit]
-    return combined
+        rows = rows[:limit]
+    return [_localized_row(session_id, row) for row in rows]
+
+
+def get_chunks_by_index(session_id: str, chunk_indices: list[int]) -> list[dict[str, Any]]:
+    """Return the chunks with the given ``chunk_index`` values, in that order; unknown ones are skipped."""
+    index = _sessions.get(session_id).index
+    return [
+        _localized_row(session_id, index.rows[index.positions[i]])
+        for i in chunk_indices
+        if i in index.positions
+    ]
@@ -0,0 +1,92 @@
+"""Compare the character chunker with the token-aware chunker.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_chunking            # synthetic 4 MB document
+    python -m benchmarks.bench_chunking --mb 16
+    python -m benchmarks.bench_chunking --file path/to/document.txt
+
+Reports throughput and how evenly each mode fills the embedding model's
+token window (chunk count and tokens per chunk).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from app.config import settings
+from app.utils.chunking import chunk_text, iter_token_chunks
+from app.utils.tokens import count_tokens, has_tokenizer
+
+_WORDS = (
+    "the bowler ran in and delivered a full ball outside off stump while the batter drove it "
+    "through covers for four runs before the next over began with a short delivery that was "
+    "pulled over midwicket revenue growth quarter customers platform analytics partnership"
+).split()
+
+
+def _synthetic_document(target_bytes: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    paragraphs: list[str] = []
+    size = 0
+    while size < target_bytes:
+        sentences = []
+        for _ in range(rng.randint(2, 8)):
+            words = rng.choices(_WORDS, k=rng.randint(6, 40))
+            words[0] = words[0].capitalize()
+            sentences.append(" ".join(words) + rng.choice([".", ".", ".", "!", "?"]))
+        # Wrap lines like text extracted from a PDF.
+        paragraph = "\n".join(" ".join(sentences)[i : i + 90] for i in range(0, len(" ".join(sentences)), 90))
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def _report(name: str, chunks: list[str], seconds: float, text_bytes: int, model: str) -> None:
+    tokens = [count_tokens(chunk, model) for chunk in chunks]
+    print(
+        f"{name:<8} {seconds * 1000:9.1f} ms  {text_bytes / 1e6 / seconds:7.1f} MB/s  "
+        f"{len(chunks):7d} chunks  tokens/chunk mean {statistics.mean(tokens):6.1f} "
+        f"stdev {statistics.pstdev(tokens):6.1f} min {min(tokens):4d} max {max(tokens):4d}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="UTF-8 text file to chunk instead of synthetic text")
+    parser.add_argument("--mb", type=float, default=4.0, help="size of the synthetic document")
+    parser.add_argument("--chunk-size", type=int, default=settings.CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=settings.CHUNK_OVERLAP)
+    parser.add_argument("--chunk-tokens", type=int, default=settings.CHUNK_TOKENS)
+    parser.add_argument("--overlap-tokens", type=int, default=settings.CHUNK_OVERLAP_TOKENS)
+    parser.add_argument("--repeat", type=int, default=3, help="best-of runs per mode")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+    else:
+        text = _synthetic_document(int(args.mb * 1024 * 1024))
+    text_bytes = len(text.encode("utf-8"))
+    model = settings.OPENAI_EMBED_MODEL
+    counter = "tiktoken" if has_tokenizer(model) else "a chars/4 estimate (install tiktoken for exact counts)"
+    print(f"{text_bytes / 1e6:.1f} MB, token counts via {counter}")
+
+    runs = {
+        "chars": lambda: chunk_text(text, args.chunk_size, args.chunk_overlap),
+        "tokens": lambda: list(iter_token_chunks([text], args.chunk_tokens, args.overlap_tokens, model)),
+    }
+    for name, run in runs.items():
+        best = float("inf")
+        chunks: list[str] = []
+        for _ in range(max(1, args.repeat)):
+            start = time.perf_counter()
+            chunks = run()
+            best = min(best, time.perf_counter() - start)
+        _report(name, chunks, best, text_bytes, model)
+
+
+if __name__ == "__main__":
+    main()
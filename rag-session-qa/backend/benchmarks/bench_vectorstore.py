@@ -0,0 +1,81 @@
+"""Compare vector index backends at typical session sizes.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_vectorstore
+    python -m benchmarks.bench_vectorstore --sizes 500 2000 10000 --dim 1536 --queries 200
+
+For each registered backend and session size, reports the time to load the session,
+p50/p95 query latency, and recall@k against exact search.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+# Keep the persistent backend's collections out of the real data directory.
+os.environ.setdefault("CHROMA_PERSIST_PATH", tempfile.mkdtemp(prefix="bench_chroma_"))
+
+from app.vectorstore import STORES, create_store
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 1000, 4000, 16000])
+    parser.add_argument("--dim", type=int, default=1536, help="text-embedding-3-small uses 1536")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=128, help="upsert batch size, as in ingest")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'backend':<18} {'chunks':>7} {'load ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7}")
+    for size in args.sizes:
+        vectors = rng.normal(size=(size, args.dim)).astype(np.float32)
+        queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact = [set(np.argsort(-(unit @ q))[: args.top_k].tolist()) for q in queries]
+        ids = [f"bench_{i}" for i in range(size)]
+        docs = [f"chunk {i}" for i in range(size)]
+        metas = [{"chunk_index": i} for i in range(size)]
+        embeddings = vectors.tolist()
+        query_lists = queries.tolist()
+
+        for name in STORES:
+            backend = create_store(name)
+            index = f"bench_{name}_{size}"
+            backend.create(index)
+            start = time.perf_counter()
+            for lo in range(0, size, args.batch):
+                hi = lo + args.batch
+                backend.upsert(index, ids[lo:hi], docs[lo:hi], metas[lo:hi], embeddings[lo:hi])
+            load_ms = (time.perf_counter() - start) * 1000
+
+            latencies: list[float] = []
+            hits = 0
+            for q, expected in zip(query_lists, exact):
+                start = time.perf_counter()
+                results = backend.query(index, q, args.top_k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len({item["metadata"]["chunk_index"] for item in results} & expected)
+            backend.delete(index)
+
+            recall = hits / (len(exact) * args.top_k)
+            print(
+                f"{name:<18} {size:>7} {load_ms:>9.1f} {statistics.median(latencies):>8.3f} "
+                f"{_percentile(latencies, 95):>8.3f} {recall:>7.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
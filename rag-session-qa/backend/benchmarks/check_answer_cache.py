@@ -0,0 +1,45 @@
+"""Check which question pairs the semantic answer cache lets share an answer.
+
+Run from ``backend/``::
+
+    python -m benchmarks.check_answer_cache
+
+Each pair is stored and looked up with the same embedding, so only the
+number and name checks decide whether the second question reuses the first
+one's answer. Exits non-zero if any pair is shared (or kept apart) wrongly.
+"""
+from __future__ import annotations
+
+import sys
+
+from app.answer_cache import SemanticAnswerCache
+
+# (cached question, new question, should the new one reuse the cached answer)
+PAIRS: list[tuple[str, str, bool]] = [
+    ("Who won the match?", "who won  the match", True),
+    ("Who won the match?", "Which team won the game?", True),
+    ("What is ALPHA revenue", "what is alpha revenue", True),
+    ("How many runs did Kohli score?", "how many runs did kohli score", True),
+    ("What did Virat Kohli do in the final?", "what did virat kohli do in the final", True),
+    ("How many runs did Kohli score?", "How many runs did Rohit score?", False),
+    ("how many runs did kohli score", "how many runs did rohit score", False),
+    ("Kohli scored how many runs?", "Rohit scored how many runs?", False),
+    ("What happened in over 3?", "What happened in over 4?", False),
+    ("What did Virat Kohli do in the final?", "What did Kohli do in the final?", False),
+]
+
+
+def main() -> int:
+    failures = 0
+    for cached, asked, expected in PAIRS:
+        cache = SemanticAnswerCache(threshold=0.5, max_entries=8, max_sessions=1)
+        cache.put("s", "v", cached, [1.0, 0.0], {"answer": cached})
+        shared = cache.get("s", "v", asked, [1.0, 0.0]) is not None
+        status = "ok" if shared == expected else "FAIL"
+        print(f"{status:4}  {'shared' if shared else 'apart':6}  {cached!r} / {asked!r}")
+        failures += shared != expected
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Check that the streaming event parser agrees with whole-document parsing.
+
+Run from ``backend/``::
+
+    python -m benchmarks.check_events
+
+Ingest feeds ``EventParser`` one page or paragraph at a time, while the rest
+of the pipeline sees those pieces joined by newlines. Each case here is fed
+both ways - split into its pieces, and as ``"\\n".join(pieces)`` in one go -
+and the resulting events, and the chunks they link to, must match. Exits
+non-zero if any check fails.
+"""
+from __future__ import annotations
+
+import sys
+
+from app.events import EventParser, EventTable
+from app.utils.chunking import iter_chunks
+
+CASES: dict[str, list[str]] = {
+    # A DOCX paragraph or PDF page ends without trailing whitespace.
+    "name across pieces": ["1.1 4 Nortje to Tilak", "Varma, FOUR, shot"],
+    "over line on its own page": ["19.4 \n6", "Corbin Bosch to Hardik Pandya, SIX, powerful hit!"],
+    "paragraph per ball": [
+        "1.1 4 Nortje to Tilak Varma, FOUR, driven",
+        "1.2 6 Nortje to Tilak Varma, SIX, pulled",
+        "1.3 W Nortje to Ishan Kishan, OUT, bowled",
+    ],
+    "stats after events": [
+        "2.1 4 Rabada to Hardik Pandya, FOUR, cut",
+        "Hardik Pandya c Marco Jansen b Corbin Bosch 30(10) [4s-2 6s-3]",
+    ],
+}
+
+
+def _parse(pieces: list[str], split: bool) -> EventTable:
+    parser = EventParser()
+    if split:
+        for _ in parser.tee(pieces):
+            pass
+    else:
+        parser.feed("\n".join(pieces))
+    table = parser.close()
+    table.attach_chunks(enumerate(iter_chunks(pieces, chunk_size=100, overlap=40)))
+    return table
+
+
+def _summary(table: EventTable) -> list[tuple]:
+    events = [(e.over, e.bowler, e.batter, e.outcome, e.chunk_index) for e in table.events]
+    stats = [(s.player, s.runs, s.balls, s.chunk_index) for s in table.stats]
+    return events + stats
+
+
+def main() -> int:
+    failures = 0
+    for name, pieces in CASES.items():
+        split, joined = _parse(pieces, split=True), _parse(pieces, split=False)
+        problems = []
+        if _summary(split) != _summary(joined):
+            problems.append(f"split {_summary(split)} != joined {_summary(joined)}")
+        # A name glued across a boundary ("TilakVarma") is in neither the pieces nor the chunks.
+        text = " ".join(" ".join(pieces).split())
+        merged = [n for e in split.events for n in (e.bowler, e.batter) if " ".join(n.split()) not in text]
+        if merged:
+            problems.append(f"names not in the document text: {merged}")
+        unlinked = [e.anchor for e in split.events if e.chunk_index is None]
+        if unlinked:
+            problems.append(f"events not linked to a chunk: {unlinked}")
+        status = "FAIL" if problems else "ok"
+        print(f"{status:4}  {name}: {len(split.events)} events, {len(split.stats)} stats")
+        for problem in problems:
+            print(f"      {problem}")
+        failures += bool(problems)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
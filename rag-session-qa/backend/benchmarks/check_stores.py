@@ -0,0 +1,147 @@
+"""Run the VectorStore contract checks against every registered backend.
+
+Run from ``backend/``::
+
+    python -m benchmarks.check_stores
+    python -m benchmarks.check_stores --backend numpy --size 4000
+
+Each backend gets the same sequence of operations: create, batched upserts,
+``get``, nearest-neighbour queries with known answers (one at a time and
+batched), ``get_embeddings``, isolation between indexes, and delete.
+Timings for each step are printed next to the result so a failing or slow
+backend stands out before it is selected via ``VECTOR_BACKEND``. Exits
+non-zero if any check fails.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+import numpy as np
+
+# Keep the persistent backend's collections out of the real data directory.
+os.environ.setdefault("CHROMA_PERSIST_PATH", tempfile.mkdtemp(prefix="check_chroma_"))
+
+from app.stores.base import VectorStore
+from app.vectorstore import STORES, create_store
+
+
+def _rows(prefix: str, vectors: np.ndarray) -> tuple[list[str], list[str], list[dict], list[list[float]]]:
+    ids = [f"{prefix}_{i}" for i in range(len(vectors))]
+    docs = [f"{prefix} chunk {i}" for i in range(len(vectors))]
+    metas = [{"chunk_index": i, "source_filename": f"{prefix}.txt"} for i in range(len(vectors))]
+    return ids, docs, metas, vectors.tolist()
+
+
+def _check(store: VectorStore, size: int, dim: int, batch: int) -> list[tuple[str, float]]:
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(size, dim)).astype(np.float32)
+    ids, docs, metas, embeddings = _rows("conf_a", vectors)
+    timings: list[tuple[str, float]] = []
+
+    def timed(label, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append((label, (time.perf_counter() - start) * 1000))
+        return result
+
+    timed("create", store.create, "conf_a")
+    timed("create", store.create, "conf_b")
+    for lo in range(0, size, batch):
+        hi = lo + batch
+        timed("upsert", store.upsert, "conf_a", ids[lo:hi], docs[lo:hi], metas[lo:hi], embeddings[lo:hi])
+    other = rng.normal(size=(8, dim)).astype(np.float32)
+    store.upsert("conf_b", *_rows("conf_b", other))
+
+    rows = timed("get", store.get, "conf_a")
+    assert len(rows) == size, f"get returned {len(rows)} rows, expected {size}"
+    by_id = {row["chunk_id"]: row for row in rows}
+    assert set(by_id) == set(ids), "get returned unexpected ids"
+    for i in (0, size // 2, size - 1):
+        row = by_id[ids[i]]
+        assert row["text"] == docs[i], f"text mismatch for {ids[i]}"
+        assert row["metadata"]["chunk_index"] == i, f"metadata mismatch for {ids[i]}"
+        assert row["metadata"]["source_filename"] == "conf_a.txt", f"metadata mismatch for {ids[i]}"
+
+    top_k = 5
+    for i in rng.choice(size, size=min(20, size), replace=False).tolist():
+        # A scaled copy of a stored vector must come back first at distance ~0.
+        results = timed("query", store.query, "conf_a", (vectors[i] * 3.0).tolist(), top_k)
+        assert len(results) == min(top_k, size), f"query returned {len(results)} results"
+        assert results[0]["chunk_id"] == ids[i], f"nearest neighbour of {ids[i]} was {results[0]['chunk_id']}"
+        assert abs(results[0]["score"]) < 1e-3, f"self-distance {results[0]['score']:.4f} is not ~0"
+        scores = [item["score"] for item in results]
+        assert scores == sorted(scores), "results are not ordered nearest first"
+        assert {"chunk_id", "text", "metadata", "score"} <= set(results[0]), "query result is missing fields"
+
+    picks = [0, size // 2, size - 1]
+    batched = timed("query_many", store.query_many, "conf_a", [vectors[i].tolist() for i in picks], top_k)
+    assert len(batched) == len(picks), "query_many should return one result list per query"
+    for i, results in zip(picks, batched):
+        single = store.query("conf_a", vectors[i].tolist(), top_k)
+        assert results[0]["chunk_id"] == ids[i], f"query_many nearest neighbour of {ids[i]} was {results[0]['chunk_id']}"
+        assert [item["chunk_id"] for item in results] == [item["chunk_id"] for item in single], (
+            "query_many and query disagree"
+        )
+    assert store.query_many("conf_a", [], top_k) == [], "an empty batch should return no result lists"
+
+    wanted = [ids[0], ids[size - 1], "conf_a_missing"]
+    stored = timed("get_embeddings", store.get_embeddings, "conf_a", wanted)
+    assert set(stored) == set(wanted[:2]), "get_embeddings should return exactly the known ids"
+    for i, chunk_id in ((0, ids[0]), (size - 1, ids[size - 1])):
+        got = np.asarray(stored[chunk_id], dtype=np.float32)
+        cosine = float(got @ vectors[i]) / (np.linalg.norm(got) * np.linalg.norm(vectors[i]))
+        assert cosine > 0.999, f"stored embedding for {chunk_id} does not match"
+
+    results = store.query("conf_a", vectors[0].tolist(), size + 10)
+    assert len(results) == size, "top_k larger than the index should return every row"
+    results = store.query("conf_b", vectors[0].tolist(), top_k)
+    assert all(item["chunk_id"].startswith("conf_b_") for item in results), "indexes are not isolated"
+
+    timed("delete", store.delete, "conf_a")
+    store.delete("conf_b")
+    store.delete("conf_missing")
+    store.create("conf_a")
+    assert store.get("conf_a") == [], "a recreated index should start empty"
+    store.delete("conf_a")
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=sorted(STORES), action="append", help="default: all")
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--batch", type=int, default=128, help="upsert batch size, as in ingest")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'backend':<18} {'result':<6} {'upsert ms':>10} {'get ms':>8} {'query ms':>9} {'delete ms':>10}")
+    for name in args.backend or list(STORES):
+        try:
+            timings = _check(create_store(name), args.size, args.dim, args.batch)
+        except Exception as exc:
+            failed = True
+            print(f"{name:<18} FAIL   {exc}")
+            traceback.print_exc()
+            continue
+        totals = {label: 0.0 for label in ("upsert", "get", "query", "delete")}
+        counts = {label: 0 for label in totals}
+        for label, ms in timings:
+            if label in totals:
+                totals[label] += ms
+                counts[label] += 1
+        query_ms = totals["query"] / max(1, counts["query"])
+        print(
+            f"{name:<18} ok     {totals['upsert']:>10.1f} {totals['get']:>8.1f} "
+            f"{query_ms:>9.3f} {totals['delete']:>10.1f}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,45 @@
 import { useState } from 'react'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
+const STATUS_POLL_MS = 1000
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms))
+
+// POST and read a server-sent event stream, calling onEvent(name, data) per event.
+const streamEvents = async (path, body, onEvent) => {
+  const res = await fetch(`${API_URL}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body)
+  })
+  if (!res.ok) {
+    const data = await res.json().catch(() => ({}))
+    throw new Error(data.detail || 'Request failed')
+  }
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      let name = 'message'
+      let data = ''
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) name = line.slice(6).trim()
+        else if (line.startsWith('data:')) data += line.slice(5).trim()
+      }
+      const payload = data ? JSON.parse(data) : {}
+      if (name === 'error') throw new Error(payload.detail || 'Request failed')
+      onEvent(name, payload)
+    }
+  }
+}
 
 export default function App() {
   const [file, setFile] = useState(null)
@@ -23,6 +62,26 @@ export default function App() {
     setRetrievalContext([])
   }
 
+  const waitForIndexing = async (id) => {
+    while (true) {
+      await sleep(STATUS_POLL_MS)
+      const res = await fetch(`${API_URL}/sessions/${id}/status`)
+      const data = await res.json()
+      if (!res.ok) {
+        throw new Error(data.detail || 'Status check failed')
+      }
+      if (data.status === 'ready') {
+        setStatus(`Document indexed successfully (${data.chunks_total} chunks).`)
+        return
+      }
+      if (data.status !== 'indexing') {
+        throw new Error(data.error || 'Indexing failed')
+      }
+      const total = data.chunks_total ?? '?'
+      setStatus(`Indexing... ${data.chunks_embedded} / ${total} chunks embedded`)
+    }
+  }
+
   const handleUpload = async () => {
     setError('')
     setStatus('')
@@ -48,8 +107,11 @@ export default function App() {
         throw new Error(data.detail || 'Upload failed')
       }
 
-      setSessionId(data.session_id)
       setStatus(data.message)
+      if (data.status === 'indexing') {
+        await waitForIndexing(data.session_id)
+      }
+      setSessionId(data.session_id)
     } catch (err) {
       setError(err.message)
     } finally {
@@ -74,20 +136,16 @@ export default function App() {
 
     try {
       setLoading(true)
-      const res = await fetch(`${API_URL}/ask`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ session_id: sessionId, question })
+      await streamEvents('/ask/stream', { session_id: sessionId, question }, (name, data) => {
+        if (name === 'citations') {
+          setCitations(data.citations || [])
+          setRetrievalContext(data.retrieval_context || [])
+        } else if (name === 'token') {
+          setAnswer((prev) => prev + data.text)
+        } else if (name === 'done') {
+          setAnswer(data.answer)
+        }
       })
-
-      const data = await res.json()
-      if (!res.ok) {
-        throw new Error(data.detail || 'Ask failed')
-      }
-
-      setAnswer(data.answer)
-      setCitations(data.citations || [])
-      setRetrievalContext(data.retrieval_context || [])
     } catch (err) {
       setError(err.message)
     } finally {
@@ -107,19 +165,15 @@ export default function App() {
 
     try {
       setLoading(true)
-      const res = await fetch(`${API_URL}/summary`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ session_id: sessionId })
+      await streamEvents('/summary/stream', { session_id: sessionId }, (name, data) => {
+        if (name === 'citations') {
+          setSummaryCitations(data.citations || [])
+        } else if (name === 'token') {
+          setSummary((prev) => prev + data.text)
+        } else if (name === 'done') {
+          setSummary(data.summary)
+        }
       })
-
-      const data = await res.json()
-      if (!res.ok) {
-        throw new Error(data.detail || 'Summary failed')
-      }
-
-      setSummary(data.summary)
-      setSummaryCitations(data.citations || [])
     } catch (err) {
       setError(err.message)
     } finally {
@@ -229,7 +283,7 @@ export default function App() {
       {error && <div className="error">{error}</div>}
 
       <footer className="footer">
-        Session-based: a new upload clears the previous vectors.
+        Session-based: each upload starts a new session.
       </footer>
     </div>
   )